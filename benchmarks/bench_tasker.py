@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Benchmarks for CronManager and the TaskerWindow refresh path.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Usage:
+    python3 benchmarks/bench_tasker.py [--sizes 10,1000,100000] [--output results.json]
+                                       [--compare previous.json]
+
+Crontab access goes through a fake `crontab` script placed first on PATH, so
+nothing touches the real crontab. The UI benchmark runs TaskerWindow in a
+child process on the Broadway backend (started with gtk4-broadwayd when
+available) or on the current display, and is skipped when neither exists.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from cron_manager import CronJob, CronManager  # noqa: E402
+
+FAKE_CRONTAB = """#!/bin/sh
+case "$1" in
+  -l) [ -f "$TASKER_BENCH_CRONTAB" ] || { echo "no crontab for bench" >&2; exit 1; }
+      exec cat "$TASKER_BENCH_CRONTAB" ;;
+  -) exec cat > "$TASKER_BENCH_CRONTAB" ;;
+esac
+exit 1
+"""
+
+SCHEDULES = [
+    ("*/5", "*", "*", "*", "*"),
+    ("0", "*", "*", "*", "*"),
+    ("30", "2", "*", "*", "1-5"),
+    ("0", "0", "1", "*", "*"),
+    ("15,45", "9-17", "*", "*", "mon-fri"),
+    ("0", "4", "*", "*", "0"),
+]
+COMMANDS = [
+    "/usr/local/bin/backup.sh --target /srv/backup/{n}",
+    "/usr/bin/python3 /opt/jobs/report_{n}.py > /var/log/report_{n}.log 2>&1",
+    "find /tmp/cache_{n} -mtime +7 -delete",
+    "curl -fsS https://example.com/ping/{n} > /dev/null",
+]
+
+UI_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+import gi
+gi.require_version("Gtk", "4.0")
+from gi.repository import Gio, GLib, Gtk
+import main
+
+repeat = int(sys.argv[2])
+timings = []
+
+def on_activate(app):
+    window = main.TaskerWindow(app)
+    window._show_error = lambda message: print(message, file=sys.stderr)
+    for _ in range(repeat):
+        started = time.perf_counter()
+        window._refresh_jobs()
+        while GLib.MainContext.default().iteration(False):
+            pass
+        timings.append(time.perf_counter() - started)
+    app.quit()
+
+app = main.MyApplication()
+app.set_flags(Gio.ApplicationFlags.NON_UNIQUE)
+app.connect("activate", on_activate)
+app.run([])
+print(json.dumps(timings))
+"""
+
+
+def generate_crontab(lines: int, seed: int = 0) -> str:
+    """Build a synthetic crontab with the given number of job lines."""
+    rng = random.Random(seed)
+    out = ["# synthetic crontab for benchmarks", "MAILTO=\"\"", ""]
+    for n in range(lines):
+        schedule = " ".join(rng.choice(SCHEDULES))
+        command = rng.choice(COMMANDS).format(n=n)
+        if n % 3 == 0:
+            out.append(f"{schedule} {command} # job {n}")
+        else:
+            out.append(f"{schedule} {command}")
+    return "\n".join(out) + "\n"
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """Return best/median/mean of wall times in seconds."""
+    timings = sorted(timings)
+    return {
+        "best": timings[0],
+        "median": timings[len(timings) // 2],
+        "mean": sum(timings) / len(timings),
+        "repeat": len(timings),
+    }
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Run func repeat times and summarize the wall times."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return summarize(timings)
+
+
+def repeat_for(size: int) -> int:
+    return 20 if size <= 1000 else 3
+
+
+def bench_parse(size: int, content: str) -> dict:
+    manager = CronManager()
+    lines = [line for line in content.splitlines() if line and not line.startswith("#")]
+
+    def parse_lines():
+        for line in lines:
+            manager._parse_cron_line(line)
+
+    result = measure(parse_lines, repeat_for(size))
+    result["lines_per_second"] = len(lines) / result["best"] if result["best"] else None
+    return result
+
+
+def bench_read_write(size: int, content: str, crontab_file: Path) -> dict:
+    manager = CronManager()
+    crontab_file.write_text(content)
+    entries = manager.get_entries()
+    return {
+        "get_jobs": measure(manager.get_jobs, repeat_for(size)),
+        "write_jobs": measure(lambda: manager._write_jobs(entries), repeat_for(size)),
+    }
+
+
+def bench_mutations(size: int, content: str, crontab_file: Path) -> dict:
+    manager = CronManager()
+    repeat = repeat_for(size)
+    job = CronJob("7", "3", "*", "*", "*", "/usr/bin/true", comment="benchmark")
+    updated = CronJob("8", "3", "*", "*", "*", "/usr/bin/true", comment="benchmark")
+
+    crontab_file.write_text(content)
+    timings = {"add_job": [], "update_job": [], "delete_job": []}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        manager.add_job(job)
+        timings["add_job"].append(time.perf_counter() - started)
+
+        added = manager.get_jobs()[-1]
+        started = time.perf_counter()
+        manager.update_job(added, updated)
+        timings["update_job"].append(time.perf_counter() - started)
+
+        changed = manager.get_jobs()[-1]
+        started = time.perf_counter()
+        manager.delete_job(changed)
+        timings["delete_job"].append(time.perf_counter() - started)
+
+    return {name: summarize(values) for name, values in timings.items()}
+
+
+def _ui_environment(workdir: Path) -> tuple[Optional[dict], Optional[subprocess.Popen], str]:
+    """Pick a display for the UI benchmark. Returns (env, broadwayd process, reason if skipped)."""
+    try:
+        subprocess.run([sys.executable, "-c", "import gi; gi.require_version('Gtk', '4.0')"],
+                       check=True, capture_output=True)
+    except subprocess.CalledProcessError:
+        return None, None, "PyGObject with GTK 4 is not installed"
+
+    env = dict(os.environ)
+    broadwayd = shutil.which("gtk4-broadwayd") or shutil.which("broadwayd")
+    if broadwayd:
+        display = ":94"
+        process = subprocess.Popen([broadwayd, display], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   cwd=workdir)
+        time.sleep(0.5)
+        env.update({"GDK_BACKEND": "broadway", "BROADWAY_DISPLAY": display})
+        return env, process, ""
+    if env.get("WAYLAND_DISPLAY") or env.get("DISPLAY"):
+        return env, None, ""
+    return None, None, "no Broadway daemon and no display available"
+
+
+def bench_ui(size: int, content: str, crontab_file: Path, env: dict) -> dict:
+    crontab_file.write_text(content)
+    repeat = 5 if size <= 1000 else 1
+    result = subprocess.run(
+        [sys.executable, "-c", UI_SCRIPT, str(ROOT), str(repeat)],
+        capture_output=True, text=True, env=env, timeout=3600,
+    )
+    if result.returncode != 0:
+        return {"skipped": f"UI run failed: {result.stderr.strip()[-500:]}"}
+    return summarize(json.loads(result.stdout.strip().splitlines()[-1]))
+
+
+def compare(results: dict, previous_path: Path) -> None:
+    """Print best-time ratios against an earlier results file."""
+    previous = json.loads(previous_path.read_text())
+
+    def flatten(data: dict, prefix: str = "") -> Dict[str, float]:
+        flat = {}
+        for key, value in data.items():
+            if isinstance(value, dict):
+                if "best" in value:
+                    flat[prefix + key] = value["best"]
+                else:
+                    flat.update(flatten(value, f"{prefix}{key}."))
+        return flat
+
+    old = flatten(previous["results"])
+    new = flatten(results["results"])
+    print(f"\nCompared with {previous_path} ({previous['meta']['timestamp']}):")
+    for key in sorted(new):
+        if key in old and old[key]:
+            ratio = new[key] / old[key]
+            flag = "  <-- slower" if ratio > 1.10 else ""
+            print(f"  {key:45s} {old[key] * 1000:10.3f} ms -> {new[key] * 1000:10.3f} ms  x{ratio:.2f}{flag}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="10,1000,100000", help="crontab sizes in lines (default: 10,1000,100000)")
+    parser.add_argument("--ui-sizes", default="10,1000", help="sizes for the UI refresh benchmark (default: 10,1000)")
+    parser.add_argument("--skip-ui", action="store_true", help="skip the TaskerWindow refresh benchmark")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"), help="JSON results file")
+    parser.add_argument("--compare", type=Path, default=None, help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    ui_sizes = [] if args.skip_ui else [int(size) for size in args.ui_sizes.split(",") if size]
+
+    with tempfile.TemporaryDirectory(prefix="tasker-bench-") as tmp:
+        workdir = Path(tmp)
+        fake_bin = workdir / "bin"
+        fake_bin.mkdir()
+        fake_crontab = fake_bin / "crontab"
+        fake_crontab.write_text(FAKE_CRONTAB)
+        fake_crontab.chmod(0o755)
+        crontab_file = workdir / "crontab.txt"
+        os.environ["PATH"] = f"{fake_bin}{os.pathsep}{os.environ.get('PATH', '')}"
+        os.environ["TASKER_BENCH_CRONTAB"] = str(crontab_file)
+        # Keep crontab history written by the benchmark out of the user's data directory
+        os.environ["XDG_DATA_HOME"] = str(workdir / "data")
+
+        results: Dict[str, dict] = {"parse": {}, "read_write": {}, "mutations": {}, "ui_refresh": {}}
+        for size in sizes:
+            content = generate_crontab(size)
+            print(f"{size} lines: parse", flush=True)
+            results["parse"][str(size)] = bench_parse(size, content)
+            print(f"{size} lines: get_jobs/_write_jobs", flush=True)
+            results["read_write"][str(size)] = bench_read_write(size, content, crontab_file)
+            print(f"{size} lines: add/update/delete", flush=True)
+            results["mutations"][str(size)] = bench_mutations(size, content, crontab_file)
+
+        if ui_sizes:
+            env, broadwayd, reason = _ui_environment(workdir)
+            try:
+                for size in ui_sizes:
+                    if env is None:
+                        results["ui_refresh"][str(size)] = {"skipped": reason}
+                        continue
+                    print(f"{size} lines: TaskerWindow._refresh_jobs", flush=True)
+                    results["ui_refresh"][str(size)] = bench_ui(size, generate_crontab(size), crontab_file, env)
+            finally:
+                if broadwayd:
+                    broadwayd.terminate()
+                    broadwayd.wait()
+
+    output = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "ui_sizes": ui_sizes,
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(output, indent=2))
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(output, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Command line entry point for Tasker.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Headless subcommands are dispatched here before anything imports GTK, so
+`tasker run`, `tasker import` and `tasker export` work on hosts without
+PyGObject or GTK 4.
+"""
+import sys
+from typing import List, Optional
+
+
+def run_subcommand(argv: List[str]) -> Optional[int]:
+    """Run a headless subcommand and return its exit status, or None for the GUI."""
+    command = argv[1] if len(argv) > 1 else None
+    if command == "run":
+        from cron_runner import main as run_main
+        return run_main(argv[2:])
+    if command in ("import", "export"):
+        from cron_formats import main as formats_main
+        return formats_main(argv[1:])
+    if command == "service":
+        from dbus_service import main as service_main
+        return service_main(argv[2:])
+    return None
+
+
+def main():
+    """Main entry point."""
+    status = run_subcommand(sys.argv)
+    if status is not None:
+        sys.exit(status)
+
+    from main import main as gui_main
+    gui_main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Static risk and cost analysis of cron job commands.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+A command is tokenized once with shlex and reduced to a CommandProfile,
+cached per command string. A job's analysis combines that profile with
+how often its schedule fires, which is cached per compiled schedule, and
+whole analyses are cached per (command, schedule), so re-analysing an
+unchanged crontab on refresh is a dictionary lookup per job.
+"""
+import re
+import shlex
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
+
+from cron_runner import split_command
+from cron_schedule import CronSchedule, ScheduleError, schedule_for_job
+
+# Programs that are I/O or CPU heavy enough to matter when run often, with a cost weight
+HEAVY_PROGRAMS = {
+    "find": 5,
+    "du": 5,
+    "rsync": 8,
+    "tar": 6,
+    "updatedb": 8,
+    "mysqldump": 8,
+    "pg_dump": 8,
+    "pg_dumpall": 8,
+    "borg": 8,
+    "restic": 8,
+    "duplicity": 8,
+    "gzip": 3,
+    "bzip2": 3,
+    "xz": 4,
+    "zstd": 2,
+    "locate": 2,
+    "rkhunter": 8,
+    "clamscan": 10,
+}
+# Wrappers that run a later word as the actual program, with the number of operands before it
+WRAPPERS = {"nice": 0, "ionice": 0, "nohup": 0, "chronic": 0, "sudo": 0, "env": 0,
+            "timeout": 1, "flock": 1, "setlock": 1, "time": 0, "exec": 0}
+# Options of each wrapper that take a separate value (nice -n 19, flock -w 10, sudo -u user);
+# flock -n and sudo -n are flags, so these cannot be shared between wrappers
+WRAPPER_VALUE_OPTIONS = {
+    "nice": {"-n", "--adjustment"},
+    "ionice": {"-c", "-n", "-p", "-P", "-u", "--class", "--classdata", "--pid", "--pgid", "--uid"},
+    "nohup": set(),
+    "chronic": set(),
+    "sudo": {"-u", "-g", "-C", "-D", "-h", "-p", "-r", "-t", "-U", "--user", "--group",
+             "--close-from", "--chdir", "--host", "--prompt", "--role", "--type", "--other-user"},
+    "env": {"-u", "-C", "-S", "--unset", "--chdir", "--split-string"},
+    "timeout": {"-s", "-k", "--signal", "--kill-after"},
+    "flock": {"-w", "-E", "--timeout", "--wait", "--conflict-exit-code"},
+    "setlock": set(),
+    "time": {"-f", "-o", "--format", "--output"},
+    "exec": {"-a"},
+}
+CONTROL_OPERATORS = {";", "&&", "||", "|", "&", "(", ")", ";;", "|&"}
+OUTPUT_REDIRECTS = {">", ">>", "&>", "&>>", ">|"}
+# Stdout piped into one of these counts as handled
+LOG_SINKS = {"logger", "systemd-cat", "tee", "chronic", "ts"}
+
+# Fires per day above which a job counts as frequent
+FREQUENT_RUNS_PER_DAY = 24
+EVERY_MINUTE = 1440
+
+LEVELS = ((500, "high"), (50, "medium"), (0, "low"))
+
+# Big enough for one entry per job of a very large crontab
+CACHE_SIZE = 1 << 18
+# Splits like shlex with punctuation_chars; only valid without quotes or escapes
+SIMPLE_TOKEN_RE = re.compile(r'[();<>|&]+|[^\s();<>|&]+')
+QUOTING_CHARS = frozenset("'\"\\")
+
+
+@dataclass(frozen=True)
+class Finding:
+    """One problem found in a job."""
+    code: str
+    message: str
+    severity: str = "warning"  # "warning" or "info"
+
+
+@dataclass(frozen=True)
+class CommandProfile:
+    """What a command runs, independent of its schedule."""
+    programs: Tuple[str, ...]
+    heavy: FrozenSet[str]
+    weight: int
+    scans_root: bool
+    has_lock: bool
+    has_nice: bool
+    output_handled: bool
+    parse_error: bool = False
+
+
+@dataclass(frozen=True)
+class JobAnalysis:
+    findings: Tuple[Finding, ...]
+    runs_per_day: float
+    cost: float
+    level: str
+
+    @property
+    def warnings(self) -> Tuple[Finding, ...]:
+        return tuple(finding for finding in self.findings if finding.severity == "warning")
+
+
+def _tokenize(command: str) -> list:
+    # Text after an unescaped % is stdin, not part of the command
+    command, _ = split_command(command)
+    if QUOTING_CHARS.isdisjoint(command):
+        # shlex is slow; most cron commands have nothing for it to unquote
+        return SIMPLE_TOKEN_RE.findall(command)
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    lexer.commenters = ""
+    return list(lexer)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def profile_command(command: str) -> CommandProfile:
+    """Tokenize a command and summarize what it runs. Cached per command string."""
+    try:
+        tokens = _tokenize(command)
+        parse_error = False
+    except ValueError:
+        # Unbalanced quotes: fall back to whitespace splitting
+        tokens = command.split()
+        parse_error = True
+
+    programs = []
+    scans_root = has_lock = has_nice = output_handled = False
+    expect_program = True
+    wrapper = None
+    skip = 0
+    option_value = False
+    current = None
+    previous = None
+    for token in tokens:
+        if token in CONTROL_OPERATORS:
+            expect_program = True
+            wrapper = current = None
+            skip = 0
+            option_value = False
+            previous = token
+            continue
+        if token in OUTPUT_REDIRECTS and previous != "2":
+            output_handled = True
+        last, previous = previous, token
+        if not expect_program:
+            if current == "find" and token == "/":
+                scans_root = True
+            continue
+        if option_value:
+            option_value = False
+            continue
+        if wrapper and token.startswith("-"):
+            option_value = token in WRAPPER_VALUE_OPTIONS[wrapper]
+            continue
+        if skip:
+            skip -= 1
+            continue
+        if "=" in token and token.split("=", 1)[0].isidentifier():
+            continue  # VAR=value prefix
+        name = token.rsplit("/", 1)[-1]
+        if last in ("|", "|&") and name in LOG_SINKS:
+            output_handled = True
+        if name in WRAPPERS:
+            has_lock = has_lock or name in ("flock", "setlock")
+            has_nice = has_nice or name in ("nice", "ionice")
+            wrapper = name
+            skip = WRAPPERS[name]
+            continue
+        programs.append(name)
+        current = name
+        expect_program = False
+
+    heavy = frozenset(name for name in programs if name in HEAVY_PROGRAMS)
+    weight = 1 + sum(HEAVY_PROGRAMS[name] for name in heavy) + (20 if scans_root else 0)
+    return CommandProfile(
+        programs=tuple(programs),
+        heavy=heavy,
+        weight=weight,
+        scans_root=scans_root,
+        has_lock=has_lock,
+        has_nice=has_nice,
+        output_handled=output_handled,
+        parse_error=parse_error,
+    )
+
+
+@lru_cache(maxsize=4096)
+def runs_per_day(schedule: CronSchedule) -> float:
+    """Average number of runs per day of a compiled schedule."""
+    per_day = bin(schedule.minutes).count("1") * bin(schedule.hours).count("1")
+    dom = bin(schedule.days).count("1") / 31
+    dow = bin(schedule.weekdays).count("1") / 7
+    if schedule.dom_restricted and schedule.dow_restricted:
+        day_share = dom + dow - dom * dow  # either field may match
+    else:
+        day_share = dom * dow
+    return per_day * day_share * bin(schedule.months).count("1") / 12
+
+
+def _level(cost: float) -> str:
+    return next(name for threshold, name in LEVELS if cost >= threshold)
+
+
+def analyze_job(job) -> JobAnalysis:
+    """Analyse a CronJob's command and schedule."""
+    try:
+        schedule = schedule_for_job(job)
+    except ScheduleError:
+        schedule = None
+    return _analyze(job.command, schedule)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _analyze(command: str, schedule: Optional[CronSchedule]) -> JobAnalysis:
+    profile = profile_command(command)
+    runs = runs_per_day(schedule) if schedule is not None else 0.0
+
+    findings = []
+    heavy = ", ".join(sorted(profile.heavy))
+    if profile.parse_error:
+        findings.append(Finding("unparsable", "The command has unbalanced quotes", "info"))
+    if profile.scans_root:
+        findings.append(Finding("find-root", "`find /` walks the whole filesystem"))
+    if profile.heavy and runs >= EVERY_MINUTE:
+        findings.append(Finding("heavy-every-minute", f"Runs {heavy} every minute"))
+    elif profile.heavy and runs > FREQUENT_RUNS_PER_DAY:
+        findings.append(Finding("heavy-frequent", f"Runs {heavy} about {runs:.0f} times a day"))
+    if not profile.has_lock and (profile.heavy or runs >= EVERY_MINUTE):
+        findings.append(Finding(
+            "no-lock", "No flock: a slow run can overlap with the next one",
+            "warning" if runs > FREQUENT_RUNS_PER_DAY else "info",
+        ))
+    if profile.heavy and not profile.has_nice:
+        findings.append(Finding("no-nice", f"{heavy} runs without nice/ionice", "info"))
+    if not profile.output_handled:
+        if runs > FREQUENT_RUNS_PER_DAY:
+            findings.append(Finding(
+                "mail-storm", f"Output is not redirected; cron may send about {runs:.0f} mails a day"))
+        else:
+            findings.append(Finding("output", "Output is not redirected and will be mailed by cron", "info"))
+
+    cost = runs * profile.weight
+    if profile.heavy:
+        if not profile.has_lock:
+            cost *= 1.5
+        if profile.has_nice:
+            cost *= 0.5
+    return JobAnalysis(findings=tuple(findings), runs_per_day=runs, cost=round(cost, 1), level=_level(cost))
@@ -0,0 +1,153 @@
+"""Detection of duplicate and redundant cron jobs.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Schedules are compared by the set of times they fire, not by their text:
+"*/15" and "0,15,30,45" compile to the same minute bitmask, "7" and "0"
+to the same weekday bit. Days are expanded to a 31 x 7 grid of
+(day of month, weekday) bits so cron's rule that restricted day fields
+combine with OR is compared exactly.
+
+Jobs are bucketed by (normalized command, timezone, user) in one pass.
+Identical schedules in a bucket are duplicates; a schedule whose fire set
+is contained in another's in the same bucket is subsumed. Only jobs in
+the same bucket are compared, so this is linear in the number of jobs
+unless one command is scheduled many different ways.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from cron_manager import CronJob
+from cron_schedule import CronSchedule, ScheduleError, schedule_for_job
+
+# A shell word: unquoted characters, backslash escapes and quoted strings, with no
+# unquoted whitespace. Quotes are kept, since '$HOME' and "$HOME" differ.
+WORD_RE = re.compile(r"""(?:[^\s'"\\]|\\.|'[^']*'|"(?:[^"\\]|\\.)*")+""", re.DOTALL)
+QUOTING_CHARS = frozenset("'\"\\")
+UNESCAPED_PERCENT_RE = re.compile(r'(?<!\\)%')
+
+# Fire set of a schedule: minutes, hours, months and day grid bitmasks
+FireSet = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class Redundancy:
+    """A job that can be removed because `kept` already runs the same command at those times."""
+    job: CronJob
+    kept: CronJob
+    kind: str  # "duplicate" or "subsumed"
+
+
+@lru_cache(maxsize=4096)
+def fire_set(schedule: CronSchedule) -> FireSet:
+    """Canonical form of a compiled schedule."""
+    grid = 0
+    for day in range(1, 32):
+        dom_ok = bool(schedule.days >> day & 1)
+        for weekday in range(7):
+            dow_ok = bool(schedule.weekdays >> weekday & 1)
+            if schedule.dom_restricted and schedule.dow_restricted:
+                fires = dom_ok or dow_ok
+            else:
+                fires = dom_ok and dow_ok
+            if fires:
+                grid |= 1 << ((day - 1) * 7 + weekday)
+    return schedule.minutes, schedule.hours, schedule.months, grid
+
+
+def is_subset(inner: FireSet, outer: FireSet) -> bool:
+    return all(a & ~b == 0 for a, b in zip(inner, outer))
+
+
+@lru_cache(maxsize=1 << 16)
+def normalize_command(command: str) -> str:
+    """Collapse whitespace between words, keeping every word's quoting as written.
+
+    Only whitespace the shell ignores is changed, so commands that differ in
+    quoting, operators or stdin never compare equal:
+
+    >>> normalize_command('echo   "$HOME" >  /tmp/a') == normalize_command('echo "$HOME" > /tmp/a')
+    True
+    >>> normalize_command('echo "$HOME" > /tmp/a') == normalize_command("echo '$HOME' > /tmp/a")
+    False
+    >>> normalize_command('echo a;b') == normalize_command('echo "a;b"')
+    False
+    """
+    # Text from the first unescaped % on is stdin, where whitespace matters
+    stdin = ""
+    percent = UNESCAPED_PERCENT_RE.search(command)
+    if percent:
+        command, stdin = command[:percent.start()], command[percent.start():]
+    if QUOTING_CHARS.isdisjoint(command):
+        # Nothing quoted; plain splitting is much faster
+        return " ".join(command.split()) + stdin
+    words = []
+    end = 0
+    for match in WORD_RE.finditer(command):
+        if command[end:match.start()].strip():
+            # Unbalanced quote: only identical text is equivalent
+            return command + stdin
+        words.append(match.group())
+        end = match.end()
+    if command[end:].strip():
+        return command + stdin
+    return " ".join(words) + stdin
+
+
+def find_redundant_jobs(jobs: List[CronJob]) -> List[Redundancy]:
+    """Return the jobs that duplicate or are subsumed by another job, in crontab order.
+
+    Disabled jobs and jobs with invalid schedules are ignored.
+    """
+    buckets: Dict[tuple, Dict[FireSet, List[CronJob]]] = {}
+    for job in jobs:
+        if not job.enabled:
+            continue
+        try:
+            fires = fire_set(schedule_for_job(job))
+        except ScheduleError:
+            continue
+        key = (normalize_command(job.command), job.timezone, job.runs_as)
+        buckets.setdefault(key, {}).setdefault(fires, []).append(job)
+
+    found: Dict[int, Redundancy] = {}
+    for schedules in buckets.values():
+        # A fire set is redundant if another one in the bucket strictly contains it
+        outer_of: Dict[FireSet, Optional[FireSet]] = {}
+        for fires in schedules:
+            outer_of[fires] = None
+            if len(schedules) > 1:
+                for other in schedules:
+                    if other != fires and is_subset(fires, other):
+                        outer_of[fires] = other
+                        break
+        for fires, same in schedules.items():
+            outer = outer_of[fires]
+            # Follow containment up to a fire set that is itself kept
+            while outer is not None and outer_of[outer] is not None:
+                outer = outer_of[outer]
+            if outer is None:
+                kept = same[0]
+                for job in same[1:]:
+                    found[id(job)] = Redundancy(job, kept, "duplicate")
+            else:
+                kept = schedules[outer][0]
+                for job in same:
+                    found[id(job)] = Redundancy(job, kept, "subsumed")
+
+    return [found[id(job)] for job in jobs if id(job) in found]
@@ -0,0 +1,228 @@
+"""Version history of crontab writes.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Every version is appended to a single pack file as a zlib-compressed
+record: a full snapshot every SNAPSHOT_INTERVAL versions, otherwise a
+line-level delta against the previous version. An index file holds one
+JSON line per version with its offset into the pack, so checking out a
+version reads one snapshot and at most SNAPSHOT_INTERVAL - 1 small deltas.
+"""
+import difflib
+import hashlib
+import json
+import os
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+SNAPSHOT_INTERVAL = 50
+
+
+@dataclass
+class HistoryVersion:
+    """Index entry for one stored crontab version."""
+    version: int
+    timestamp: str
+    sha256: str
+    kind: str  # "snapshot" or "delta"
+    offset: int
+    length: int
+    lines: int
+
+
+def history_dir(scope: str) -> Path:
+    data_home = os.environ.get("XDG_DATA_HOME") or str(Path.home() / ".local" / "share")
+    return Path(data_home) / "tasker" / "history" / scope
+
+
+def make_delta(old: List[str], new: List[str]) -> list:
+    """Encode new as operations on old: ["=", n] keep, ["-", n] drop, ["+", lines] insert."""
+    # Trim the common prefix and suffix first; most edits touch a few lines
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = new[prefix:len(new) - suffix]
+
+    ops = []
+    if prefix:
+        ops.append(["=", prefix])
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i2 - i1])
+            continue
+        if i2 > i1:
+            ops.append(["-", i2 - i1])
+        if j2 > j1:
+            ops.append(["+", new_middle[j1:j2]])
+    if suffix:
+        ops.append(["=", suffix])
+    return ops
+
+
+def apply_delta(old: List[str], ops: list) -> List[str]:
+    new = []
+    position = 0
+    for op, value in ops:
+        if op == "=":
+            new.extend(old[position:position + value])
+            position += value
+        elif op == "-":
+            position += value
+        else:
+            new.extend(value)
+    return new
+
+
+class CronHistory:
+    """Append-only history of crontab contents for one crontab (user or system)."""
+
+    def __init__(self, scope: str, directory: Optional[Path] = None,
+                 snapshot_interval: int = SNAPSHOT_INTERVAL):
+        self.directory = directory or history_dir(scope)
+        self.snapshot_interval = snapshot_interval
+        self._index: Optional[List[HistoryVersion]] = None
+        self._index_size = 0
+        # (version, lines) of the last version built, reused for deltas and sequential checkouts
+        self._cached: Optional[tuple[int, List[str]]] = None
+
+    @property
+    def _pack_path(self) -> Path:
+        return self.directory / "history.pack"
+
+    @property
+    def _index_path(self) -> Path:
+        return self.directory / "index.jsonl"
+
+    def versions(self) -> List[HistoryVersion]:
+        """Return all stored versions, oldest first."""
+        try:
+            size = self._index_path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        # Reload when another Tasker instance has appended since we last read
+        if self._index is None or size != self._index_size:
+            self._index = []
+            self._cached = None
+            if size:
+                with open(self._index_path) as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            self._index.append(HistoryVersion(**json.loads(line)))
+                        except (ValueError, TypeError):
+                            # A line torn by a crash mid-append; record() starts a new line after it
+                            continue
+            self._index_size = size
+        return self._index
+
+    def latest(self) -> Optional[HistoryVersion]:
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def _read_record(self, entry: HistoryVersion):
+        with open(self._pack_path, "rb") as f:
+            f.seek(entry.offset)
+            return json.loads(zlib.decompress(f.read(entry.length)))
+
+    def _lines(self, version: int) -> List[str]:
+        versions = self.versions()
+        if not 1 <= version <= len(versions):
+            raise ValueError(f"No such history version: {version}")
+        if self._cached and self._cached[0] == version:
+            return self._cached[1]
+
+        snapshot = version - 1
+        while versions[snapshot].kind != "snapshot":
+            snapshot -= 1
+        if self._cached and snapshot + 1 <= self._cached[0] < version:
+            # Continue from the cached version instead of the snapshot
+            start, lines = self._cached
+        else:
+            lines = self._read_record(versions[snapshot])
+            start = snapshot + 1
+        # versions[start:version] are the deltas for versions start + 1 .. version
+        with open(self._pack_path, "rb") as f:
+            for entry in versions[start:version]:
+                f.seek(entry.offset)
+                lines = apply_delta(lines, json.loads(zlib.decompress(f.read(entry.length))))
+        self._cached = (version, lines)
+        return lines
+
+    def checkout(self, version: int) -> str:
+        """Return the crontab content of a version."""
+        lines = self._lines(version)
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def record(self, content: str) -> Optional[HistoryVersion]:
+        """Store content as a new version. Returns None if it matches the latest version."""
+        sha = hashlib.sha256(content.encode()).hexdigest()
+        latest = self.latest()
+        if latest and latest.sha256 == sha:
+            return None
+
+        lines = content.splitlines()
+        version = latest.version + 1 if latest else 1
+        kind, payload = "snapshot", lines
+        if latest is not None and (version - 1) % self.snapshot_interval != 0:
+            try:
+                kind, payload = "delta", make_delta(self._lines(latest.version), lines)
+            except (ValueError, zlib.error):
+                pass  # the previous version is damaged; a snapshot does not depend on it
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = zlib.compress(json.dumps(payload, separators=(",", ":")).encode(), 9)
+        with open(self._pack_path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+        entry = HistoryVersion(
+            version=version,
+            timestamp=datetime.now().isoformat(timespec="seconds"),
+            sha256=sha,
+            kind=kind,
+            offset=offset,
+            length=len(data),
+            lines=len(lines),
+        )
+        with open(self._index_path, "a+") as f:
+            record = json.dumps(asdict(entry)) + "\n"
+            if f.tell():
+                f.seek(f.tell() - 1)
+                if f.read(1) != "\n":
+                    record = "\n" + record  # don't extend a torn last line
+            f.write(record)
+        self._index.append(entry)
+        self._index_size = self._index_path.stat().st_size
+        self._cached = (version, lines)
+        return entry
+
+    def diff(self, version: int, other: Optional[int] = None) -> str:
+        """Unified diff from `other` (default: the previous version) to `version`."""
+        if other is None:
+            other = version - 1
+        old = self._lines(other) if other >= 1 else []
+        new = self._lines(version)
+        return "\n".join(difflib.unified_diff(
+            old, new, fromfile=f"version {other}", tofile=f"version {version}", lineterm=""))
@@ -15,10 +15,62 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import difflib
+import fcntl
+import os
 import re
 import subprocess
-from dataclasses import dataclass
-from typing import List, Optional
+import sys
+import tempfile
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import groupby
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from cron_history import CronHistory
+from cron_schedule import CronSchedule, schedule_for_job
+from perf_trace import tracer
+
+ENV_LINE_RE = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*)\s*=\s*(.*)$')
+
+# Disabled jobs are kept in the crontab as comments with this prefix
+DISABLED_PREFIX = "# tasker:disabled "
+DISABLED_RE = re.compile(r'^#\s*tasker:disabled\s+(.*)$')
+# Tags live in the job comment: "Nightly dump tasker:tags=backup,db"
+TAGS_RE = re.compile(r'(?:^|\s)tasker:tags=(\S*)')
+
+BATCH_OPERATIONS = ("add", "remove", "enable", "disable")
+
+# How often a write is re-merged when the crontab keeps changing underneath it
+MAX_COMMIT_ATTEMPTS = 5
+
+# Root's crontab is edited by several users through sudo, so its lock must not be
+# in a per-user directory. It is created through sudo in a directory only root can
+# write, so no other user can put a file of their own there first
+SYSTEM_LOCK_PATH = Path("/run/tasker/system.lock")
+
+# How long to wait for the lock before giving up, and how often to try it
+LOCK_TIMEOUT = 5.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+class CrontabConflict(RuntimeError):
+    """Our change and a concurrent change to the crontab touch the same lines."""
+
+
+def parse_env_line(line: str) -> Optional[tuple[str, str]]:
+    """Parse a NAME=value crontab line. Returns (name, value) or None."""
+    match = ENV_LINE_RE.match(line.strip())
+    if not match:
+        return None
+    value = match.group(2).strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        value = value[1:-1]
+    return match.group(1), value
 
 
 @dataclass
@@ -32,23 +84,158 @@ class CronJob:
     command: str
     comment: Optional[str] = None
     original_line: Optional[str] = None  # keep original for matching when editing
+    timezone: Optional[str] = None  # from the CRON_TZ/TZ line in effect, not written back
+    enabled: bool = True
+    source: Optional[str] = None  # where the job was read from, for display; not written back
+    user: Optional[str] = None  # user column of /etc/crontab and /etc/cron.d files
+    # Schedule compiled when the job was loaded (e.g. from the parse cache)
+    compiled: Optional[CronSchedule] = field(default=None, repr=False, compare=False)
+    # Owner of a per-user spool file, which has no user column; for display, not written back
+    owner: Optional[str] = None
+
+    @property
+    def runs_as(self) -> Optional[str]:
+        """The user the job runs as, if known."""
+        return self.user or self.owner
+
+    @property
+    def tags(self) -> List[str]:
+        match = TAGS_RE.search(self.comment or "")
+        if not match:
+            return []
+        return [tag for tag in match.group(1).split(",") if tag]
+
+    @property
+    def title(self) -> Optional[str]:
+        """The comment without the tags marker."""
+        if not self.comment:
+            return None
+        return TAGS_RE.sub("", self.comment).strip() or None
 
     def to_cron_string(self) -> str:
         parts = [self.minute, self.hour, self.day_of_month, self.month, self.day_of_week, self.command]
+        if self.user:
+            parts.insert(5, self.user)
+        line = " ".join(parts)
         if self.comment:
-            return " ".join(parts) + f" # {self.comment}"
-        return " ".join(parts)
+            line += f" # {self.comment}"
+        if not self.enabled:
+            line = DISABLED_PREFIX + line
+        return line
 
     def __str__(self) -> str:
         schedule = f"{self.minute} {self.hour} {self.day_of_month} {self.month} {self.day_of_week}"
         return f"{schedule} → {self.command}"
 
 
+# A crontab line: a parsed job, or any other line (comment, variable, blank) kept verbatim
+CrontabEntry = Union[CronJob, str]
+
+
+def lock_path(scope: str) -> Path:
+    if scope == "system":
+        return SYSTEM_LOCK_PATH
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return Path(runtime_dir) / "tasker" / f"{scope}.lock"
+
+
+def _open_lock(path: Path) -> int:
+    """Open a lock file read-only (enough for flock), creating it if needed."""
+    flags = os.O_RDONLY | os.O_NOFOLLOW
+    while True:
+        try:
+            return os.open(path, flags)
+        except FileNotFoundError:
+            pass
+        try:
+            fd = os.open(path, flags | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            continue  # created by someone else in between
+        return fd
+
+
+def _open_system_lock(path: Path) -> int:
+    """Open the system lock, creating it as root on first use after boot."""
+    try:
+        return os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+    except FileNotFoundError:
+        pass
+    # touch leaves an existing file (and any lock on it) alone; sudo's umask keeps it 0644
+    result = subprocess.run(["sudo", "-n", "sh", "-c", 'mkdir -p -m 755 "$1" && touch "$2"',
+                             "sh", str(path.parent), str(path)],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        if "password is required" in result.stderr.lower():
+            raise RuntimeError("sudo: a password is required (credentials expired)")
+        raise RuntimeError(f"Failed to create {path}: {result.stderr.strip()}")
+    return os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+
+
+def _made_same_edit(base_lines: List[str], their_lines: List[str], position: Dict[int, int],
+                    i1: int, i2: int, replacement: List[str]) -> bool:
+    """Whether theirs replaced base_lines[i1:i2] with the same lines we did."""
+    before = next((position[k] for k in range(i1 - 1, -1, -1) if k in position), -1)
+    after = next((position[k] for k in range(i2, len(base_lines)) if k in position), len(their_lines))
+    if any(k in position for k in range(i1, i2)):
+        return False  # theirs kept part of the block we changed
+    return their_lines[before + 1:after] == replacement
+
+
+def merge_crontab(base: str, ours: str, theirs: str) -> str:
+    """Three-way merge of crontab texts, line by line (one line is one job).
+
+    Our edits relative to base are replayed onto theirs; edits theirs already
+    made identically are skipped. Raises CrontabConflict when a line we changed
+    or removed was changed or removed differently in theirs.
+    """
+    base_lines = base.splitlines()
+    our_lines = ours.splitlines()
+    their_lines = theirs.splitlines()
+
+    # Where each base line ended up in theirs, if they left it alone
+    position = {}
+    matcher = difflib.SequenceMatcher(None, base_lines, their_lines, autojunk=False)
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            position[block.a + k] = block.b + k
+
+    hunks = []
+    matcher = difflib.SequenceMatcher(None, base_lines, our_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if _made_same_edit(base_lines, their_lines, position, i1, i2, our_lines[j1:j2]):
+            continue
+        if i1 == i2:
+            # Pure insertion: anchor after the nearest base line still present in theirs
+            if i1 == len(base_lines):
+                start = len(their_lines)
+            else:
+                anchor = next((k for k in range(i1 - 1, -1, -1) if k in position), None)
+                start = position[anchor] + 1 if anchor is not None else 0
+            hunks.append((start, start, our_lines[j1:j2]))
+            continue
+        if any(k not in position for k in range(i1, i2)):
+            changed = next(base_lines[k] for k in range(i1, i2) if k not in position)
+            raise CrontabConflict(f"Crontab was changed by another program: conflicting edit to '{changed}'")
+        hunks.append((position[i1], position[i2 - 1] + 1, our_lines[j1:j2]))
+
+    merged = list(their_lines)
+    # Apply from the bottom up so earlier positions stay valid
+    for start, end, lines in sorted(hunks, key=lambda hunk: (hunk[0], hunk[1]), reverse=True):
+        merged[start:end] = lines
+    return "\n".join(merged) + "\n" if merged else ""
+
+
 class CronManager:
     """Handles crontab operations for user/system crontabs."""
 
     def __init__(self, is_system: bool = False):
         self.is_system = is_system
+        self.history = CronHistory("system" if is_system else "user")
+        self._last_read: Optional[str] = None  # content from the last successful list
+        # Called after every successful write, e.g. to notify D-Bus clients
+        self.on_change: Optional[Callable[[], None]] = None
 
     def _run_crontab_command(self, operation: str, content: Optional[str] = None) -> tuple[str, str, int]:
         """Run crontab command. Returns (stdout, stderr, return_code)."""
@@ -57,25 +244,44 @@ class CronManager:
                 cmd = ["sudo", "-n", "crontab", "-l"]
             else:
                 cmd = ["crontab", "-l"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            return result.stdout, result.stderr, result.returncode
         elif operation == "write":
             if self.is_system:
                 cmd = ["sudo", "-n", "crontab", "-"]
             else:
                 cmd = ["crontab", "-"]
-            result = subprocess.run(cmd, input=content, capture_output=True, text=True)
-            return result.stdout, result.stderr, result.returncode
-        return "", "", 1
+        else:
+            return "", "", 1
+        
+        # Spawn and wait are traced separately to tell sudo/exec cost from crontab's own work
+        with tracer.span("crontab.spawn", operation=operation, sudo=self.is_system):
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if operation == "write" else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        with tracer.span("crontab.wait", operation=operation, sudo=self.is_system):
+            stdout, stderr = process.communicate(content)
+        return stdout, stderr, process.returncode
 
     def get_jobs(self) -> List[CronJob]:
         """Read all cron jobs from crontab."""
+        return [entry for entry in self.get_entries() if isinstance(entry, CronJob)]
+
+    def get_entries(self) -> List[CrontabEntry]:
+        """Read every crontab line, with job lines parsed into CronJob."""
+        return self.parse_entries(self._read_content())
+
+    def _read_content(self) -> str:
+        """Read the raw crontab text ("" if there is none)."""
         output, error, return_code = self._run_crontab_command("list")
         
         error_lower = error.lower()
         output_lower = output.lower()
         if return_code != 0 and ("no crontab" in error_lower or "no crontab" in output_lower):
-            return []
+            self._last_read = ""
+            return ""
         
         if return_code != 0:
             error_msg = error.strip() if error.strip() else output.strip()
@@ -83,29 +289,67 @@ class CronManager:
                 raise RuntimeError("sudo: a password is required (credentials expired)")
             raise RuntimeError(f"Failed to read crontab: {error_msg}")
 
-        jobs = []
-        for line in output.splitlines():
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
+        self._last_read = output
+        return output
+
+    def parse_jobs(self, content: str, with_user: bool = False) -> List[CronJob]:
+        """Parse crontab text into jobs, skipping comments, variables and blank lines."""
+        return [entry for entry in self.parse_entries(content, with_user) if isinstance(entry, CronJob)]
+
+    def parse_entries(self, content: str, with_user: bool = False) -> List[CrontabEntry]:
+        """Parse crontab text without losing any lines.
+
+        Jobs pick up the timezone of the last CRON_TZ (or TZ) line above them.
+        with_user parses the system format of /etc/crontab and /etc/cron.d,
+        which has a user column before the command.
+        """
+        with tracer.span("parse"):
+            return self._parse_entries(content, with_user)
+
+    def _parse_entries(self, content: str, with_user: bool = False) -> List[CrontabEntry]:
+        entries: List[CrontabEntry] = []
+        cron_tz = None
+        tz = None
+        for raw_line in content.splitlines():
+            line = raw_line.strip()
+            job = None
+            disabled = DISABLED_RE.match(line)
+            if disabled:
+                job = self._parse_cron_line(disabled.group(1), with_user)
+                if job:
+                    job.enabled = False
+                    job.original_line = line
+            elif line and not line.startswith("#"):
+                variable = parse_env_line(line)
+                if variable:
+                    name, value = variable
+                    if name == "CRON_TZ":
+                        cron_tz = value or None
+                    elif name == "TZ":
+                        tz = value or None
+                else:
+                    job = self._parse_cron_line(line, with_user)
             
-            job = self._parse_cron_line(line)
             if job:
-                jobs.append(job)
+                job.timezone = cron_tz or tz
+                entries.append(job)
+            else:
+                entries.append(raw_line)
         
-        return jobs
+        return entries
 
-    def _parse_cron_line(self, line: str) -> Optional[CronJob]:
+    def _parse_cron_line(self, line: str, with_user: bool = False) -> Optional[CronJob]:
         """Parse a crontab line into CronJob. Returns None if invalid."""
         comment_match = re.search(r'\s+#\s+(.+)$', line)
         comment = comment_match.group(1) if comment_match else None
         line_without_comment = re.sub(r'\s+#\s+.+$', '', line)
         
         parts = line_without_comment.split()
-        if len(parts) < 6:
+        if len(parts) < (7 if with_user else 6):
             return None
         
         minute, hour, day_of_month, month, day_of_week = parts[:5]
+        user = parts.pop(5) if with_user else None
         command = " ".join(parts[5:])
         
         return CronJob(
@@ -116,59 +360,341 @@ class CronManager:
             day_of_week=day_of_week,
             command=command,
             comment=comment,
-            original_line=line
+            original_line=line,
+            user=user,
         )
 
     def add_job(self, job: CronJob) -> None:
         """Add a new cron job."""
+        # Catch bad schedules locally instead of waiting for `crontab -` to reject the file
+        schedule_for_job(job)
+        # Appending would put the job under the last CRON_TZ line and into its zone
+        self._modify(lambda entries: self._insert_jobs(entries, [job]))
+
+    def add_jobs(self, jobs: Iterable[CronJob]) -> int:
+        """Add many jobs with a single crontab write. Returns the number added.
+
+        Every job is validated before anything is written. Jobs with a timezone
+        are grouped under CRON_TZ lines.
+        """
+        new_jobs = []
+        for job in jobs:
+            schedule_for_job(job)
+            new_jobs.append(job)
+        if not new_jobs:
+            return 0
+        
+        self._modify(lambda entries: self._insert_jobs(entries, new_jobs))
+        return len(new_jobs)
+
+    @staticmethod
+    def _insert_jobs(entries: List[CrontabEntry], new_jobs: List[CronJob]) -> List[CrontabEntry]:
+        zone_lines = [i for i, entry in enumerate(entries)
+                      if isinstance(entry, str) and (parse_env_line(entry) or ("",))[0] in ("CRON_TZ", "TZ")]
+        cron_tz = tz = None
+        for i in zone_lines:
+            name, value = parse_env_line(entries[i])
+            if name == "CRON_TZ":
+                cron_tz = value or None
+            else:
+                tz = value or None
+        current_zone = cron_tz or tz
+        
+        # Jobs in local time go above the first timezone line so they don't inherit it
+        local_jobs = [job for job in new_jobs if not job.timezone]
+        insert_at = zone_lines[0] if zone_lines else len(entries)
+        entries[insert_at:insert_at] = local_jobs
+        
+        zoned_jobs = sorted((job for job in new_jobs if job.timezone), key=lambda job: job.timezone)
+        for zone, group in groupby(zoned_jobs, key=lambda job: job.timezone):
+            if zone != current_zone:
+                entries.append(f"CRON_TZ={zone}")
+                current_zone = zone
+            entries.extend(group)
+        return entries
+
+    def import_jobs(self, path: str, fmt: str) -> int:
+        """Import jobs from a JSON/CSV file ("-" for stdin) or a directory of systemd units."""
+        from cron_formats import import_systemd, read_jobs
+        
+        if fmt == "systemd":
+            return self.add_jobs(import_systemd(Path(path)))
+        if path == "-":
+            return self.add_jobs(read_jobs(sys.stdin, fmt))
+        with open(path, newline="") as stream:
+            return self.add_jobs(read_jobs(stream, fmt))
+
+    def export_jobs(self, path: str, fmt: str) -> int:
+        """Export all jobs to a JSON/CSV file ("-" for stdout) or a directory of systemd units."""
+        from cron_formats import export_systemd, write_jobs
+        
         jobs = self.get_jobs()
-        jobs.append(job)
-        self._write_jobs(jobs)
+        if fmt == "systemd":
+            return export_systemd(jobs, Path(path))
+        if path == "-":
+            return write_jobs(jobs, sys.stdout, fmt)
+        with open(path, "w", newline="") as stream:
+            return write_jobs(jobs, stream, fmt)
 
     def update_job(self, old_job: CronJob, new_job: CronJob) -> None:
         """Update an existing cron job."""
-        jobs = self.get_jobs()
-        for i, job in enumerate(jobs):
-            if (job.original_line == old_job.original_line or
-                (job.minute == old_job.minute and
-                 job.hour == old_job.hour and
-                 job.day_of_month == old_job.day_of_month and
-                 job.month == old_job.month and
-                 job.day_of_week == old_job.day_of_week and
-                 job.command == old_job.command)):
-                jobs[i] = new_job
-                break
-        self._write_jobs(jobs)
+        schedule_for_job(new_job)
+        
+        def replace(entries: List[CrontabEntry]) -> List[CrontabEntry]:
+            for i, entry in enumerate(entries):
+                if isinstance(entry, CronJob) and self._is_same_job(entry, old_job):
+                    entries[i] = new_job
+                    break
+            return entries
+        
+        self._modify(replace)
 
     def delete_job(self, job: CronJob) -> None:
         """Delete a cron job."""
-        jobs = self.get_jobs()
-        jobs = [j for j in jobs if not (
-            j.original_line == job.original_line or
-            (j.minute == job.minute and
-             j.hour == job.hour and
-             j.day_of_month == job.day_of_month and
-             j.month == job.month and
-             j.day_of_week == job.day_of_week and
-             j.command == job.command))
-        ]
-        self._write_jobs(jobs)
-
-    def _write_jobs(self, jobs: List[CronJob]) -> None:
-        """Write all jobs to crontab."""
+        self._modify(lambda entries: [e for e in entries
+                                      if not (isinstance(e, CronJob) and self._is_same_job(e, job))])
+
+    def apply_batch(self, operations: Iterable[tuple[str, CronJob]]) -> int:
+        """Apply add/remove/enable/disable operations with a single crontab write.
+
+        Every added job is validated before anything is written. Operations on
+        jobs that are not in the crontab are skipped. Returns the number applied.
+        """
+        operations = list(operations)
+        for op, job in operations:
+            if op not in BATCH_OPERATIONS:
+                raise ValueError(f"Unknown operation: {op}")
+            if op == "add":
+                schedule_for_job(job)
+        applied = 0
+
+        def change(entries: List[CrontabEntry]) -> List[CrontabEntry]:
+            nonlocal applied
+            applied = 0
+            # Index jobs the way _is_same_job matches them, so each operation is a lookup
+            by_line: Dict[str, List[int]] = {}
+            by_key: Dict[tuple, List[int]] = {}
+            for i, entry in enumerate(entries):
+                if isinstance(entry, CronJob):
+                    by_line.setdefault(entry.original_line, []).append(i)
+                    by_key.setdefault(self._job_key(entry), []).append(i)
+            removed = set()
+            added = []
+            for op, job in operations:
+                if op == "add":
+                    added.append(job)
+                    applied += 1
+                    continue
+                candidates = by_line.get(job.original_line, []) if job.original_line else []
+                candidates = candidates or by_key.get(self._job_key(job), [])
+                index = next((i for i in candidates if i not in removed), None)
+                if index is None:
+                    continue
+                if op == "remove":
+                    removed.add(index)
+                else:
+                    entries[index].enabled = op == "enable"
+                applied += 1
+            entries = [entry for i, entry in enumerate(entries) if i not in removed]
+            return self._insert_jobs(entries, added) if added else entries
+
+        if operations:
+            self._modify(change)
+        return applied
+
+    def delete_jobs(self, jobs: Iterable[CronJob]) -> int:
+        """Delete many jobs with a single crontab write. Returns the number removed.
+
+        Jobs are matched by their original line and timezone, one crontab line
+        per job, so of several identical lines only as many as given are
+        removed (the last ones).
+        """
+        lines = Counter((job.original_line or job.to_cron_string(), job.timezone) for job in jobs)
+        removed = 0
+        
+        def remove(entries: List[CrontabEntry]) -> List[CrontabEntry]:
+            nonlocal removed
+            remaining = Counter(lines)
+            kept = []
+            for entry in reversed(entries):
+                if isinstance(entry, CronJob):
+                    key = (entry.original_line or entry.to_cron_string(), entry.timezone)
+                    if remaining[key] > 0:
+                        remaining[key] -= 1
+                        continue
+                kept.append(entry)
+            removed = len(entries) - len(kept)
+            kept.reverse()
+            return kept
+        
+        if lines:
+            self._modify(remove)
+        return removed
+
+    def tag_index(self, jobs: Optional[Iterable[CronJob]] = None) -> Dict[str, List[CronJob]]:
+        """Map each tag to its jobs (all jobs in the crontab if none are given)."""
+        index: Dict[str, List[CronJob]] = {}
+        for job in self.get_jobs() if jobs is None else jobs:
+            for tag in job.tags:
+                index.setdefault(tag, []).append(job)
+        return index
+
+    def set_jobs_enabled(self, jobs: Iterable[CronJob], enabled: bool) -> int:
+        """Enable or disable many jobs with a single crontab write. Returns the number changed."""
+        targets = list(jobs)
+        # Same matching as _is_same_job, as set lookups so large groups stay linear
+        lines = {job.original_line for job in targets if job.original_line}
+        keys = {self._job_key(job) for job in targets}
+        changed = 0
+        
+        def toggle(entries: List[CrontabEntry]) -> List[CrontabEntry]:
+            nonlocal changed
+            changed = 0
+            for entry in entries:
+                if (isinstance(entry, CronJob) and entry.enabled != enabled
+                        and (entry.original_line in lines or self._job_key(entry) in keys)):
+                    entry.enabled = enabled
+                    changed += 1
+            return entries
+        
+        if targets:
+            self._modify(toggle)
+        return changed
+
+    def set_tag_enabled(self, tag: str, enabled: bool) -> int:
+        """Enable or disable every job tagged with tag in a single crontab write."""
+        changed = 0
+        
+        def toggle(entries: List[CrontabEntry]) -> List[CrontabEntry]:
+            nonlocal changed
+            changed = 0
+            for entry in entries:
+                if isinstance(entry, CronJob) and entry.enabled != enabled and tag in entry.tags:
+                    entry.enabled = enabled
+                    changed += 1
+            return entries
+        
+        self._modify(toggle)
+        return changed
+
+    @staticmethod
+    def _job_key(job: CronJob) -> tuple:
+        return (job.minute, job.hour, job.day_of_month, job.month, job.day_of_week, job.command)
+
+    @staticmethod
+    def _is_same_job(job: CronJob, other: CronJob) -> bool:
+        return (job.original_line == other.original_line or
+                (job.minute == other.minute and
+                 job.hour == other.hour and
+                 job.day_of_month == other.day_of_month and
+                 job.month == other.month and
+                 job.day_of_week == other.day_of_week and
+                 job.command == other.command))
+
+    @contextmanager
+    def _locked(self):
+        """Hold the advisory lock shared by all Tasker instances editing this crontab."""
+        path = lock_path("system" if self.is_system else "user")
+        if self.is_system:
+            fd = _open_system_lock(path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd = _open_lock(path)
+        try:
+            # Anyone who can read the lock can hold it, so never wait for it indefinitely
+            with tracer.span("lock.wait"):
+                deadline = time.monotonic() + LOCK_TIMEOUT
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            raise RuntimeError("crontab is locked by another process")
+                        time.sleep(LOCK_POLL_INTERVAL)
+            yield
+        finally:
+            os.close(fd)  # releases the lock
+
+    def _modify(self, change: Callable[[List[CrontabEntry]], List[CrontabEntry]]) -> None:
+        """Apply change to the crontab as last read and commit the result.
+
+        Only the first change of a manager reads the crontab up front; later
+        ones start from what the previous read or write left, and _commit
+        catches anything that changed it since.
+        """
+        with self._locked():
+            if self._last_read is None:
+                self._read_content()
+            base = self._last_read or ""
+            content = self._render(change(self.parse_entries(base)))
+            if content != base:
+                self._commit(base, content, change)
+
+    def _commit(self, base: str, content: str,
+                change: Callable[[List[CrontabEntry]], List[CrontabEntry]]) -> None:
+        """Write content if the crontab still holds base, else merge onto what is there.
+
+        The lock only keeps other Tasker instances out; `crontab -e` and scripts
+        can still write in between, which the compare-and-swap catches. When
+        the merge conflicts, change is applied again to the current jobs.
+        """
+        for _ in range(MAX_COMMIT_ATTEMPTS):
+            current = self._read_content()
+            if current == base:
+                self._write_content(content)
+                return
+            with tracer.span("merge"):
+                try:
+                    content = merge_crontab(base, content, current)
+                except CrontabConflict:
+                    content = self._render(change(self.parse_entries(current)))
+            base = current
+            if content == base:
+                return
+        raise RuntimeError("Failed to write crontab: it kept changing during the update")
+
+    @staticmethod
+    def _render(entries: List[CrontabEntry]) -> str:
         lines = []
-        for job in jobs:
-            lines.append(job.to_cron_string())
+        for entry in entries:
+            lines.append(entry if isinstance(entry, str) else entry.to_cron_string())
         
         content = "\n".join(lines)
         if content:
             content += "\n"
-        
-        stdout, stderr, return_code = self._run_crontab_command("write", content)
+        return content
+
+    def _write_jobs(self, entries: List[CrontabEntry]) -> None:
+        """Write all jobs to crontab. Other lines are written back unchanged."""
+        self._write_content(self._render(entries))
+
+    def _write_content(self, content: str) -> None:
+        """Write raw crontab text and record it in the history."""
+        with tracer.span("write", bytes=len(content)):
+            stdout, stderr, return_code = self._run_crontab_command("write", content)
         if return_code != 0:
             error_msg = stderr.strip() if stderr.strip() else stdout.strip()
             error_lower = error_msg.lower()
             if self.is_system and ("password is required" in error_lower or "a password is required" in error_lower):
                 raise RuntimeError("sudo: a password is required (credentials expired)")
             raise RuntimeError(f"Failed to write crontab: {error_msg}")
+        
+        # History is a convenience; failing to save it must not fail the write
+        try:
+            if self.history.latest() is None and self._last_read:
+                # Keep what was there before Tasker's first write
+                self.history.record(self._last_read)
+            self.history.record(content)
+        except (OSError, ValueError, zlib.error):
+            # The crontab is already written; a damaged history must not make the write look failed
+            pass
+        self._last_read = content
+        if self.on_change:
+            self.on_change()
+
+    def rollback(self, version: int) -> None:
+        """Restore the crontab to a version from the history (recorded as a new version)."""
+        with self._locked():
+            self._write_content(self.history.checkout(version))
 
@@ -0,0 +1,287 @@
+"""User-space cron runner for hosts without a cron daemon.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import argparse
+import heapq
+import json
+import logging
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, tzinfo
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from cron_manager import CronJob, CronManager, parse_env_line
+from cron_schedule import CronSchedule, get_zone, next_fire, schedule_for_job
+
+log = logging.getLogger("tasker.run")
+
+
+def split_command(command: str) -> tuple[str, Optional[str]]:
+    """Split a cron command at the first unescaped %. Returns (command, stdin)."""
+    parts = re.split(r'(?<!\\)%', command)
+    command = parts[0].replace("\\%", "%")
+    if len(parts) == 1:
+        return command, None
+    stdin = "\n".join(part.replace("\\%", "%") for part in parts[1:]) + "\n"
+    return command, stdin
+
+
+def parse_env(content: str) -> Dict[str, str]:
+    """Collect NAME=value lines from crontab text."""
+    env = {}
+    for line in content.splitlines():
+        variable = parse_env_line(line)
+        if variable:
+            env[variable[0]] = variable[1]
+    return env
+
+
+@dataclass
+class JobStats:
+    """Run counters for a single job."""
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    total_seconds: float = 0.0
+    last_exit: Optional[int] = None
+    last_started: Optional[str] = None
+
+
+@dataclass
+class _Entry:
+    job: CronJob
+    schedule: CronSchedule
+    zone: tzinfo
+    key: str
+    running: int = 0
+    stats: JobStats = field(default_factory=JobStats)
+
+
+class CronRunner:
+    """Runs jobs from a crontab file, sleeping until the next one is due."""
+
+    def __init__(self, path: Path, max_workers: int = 4, max_instances: int = 1,
+                 timeout: Optional[float] = None, reload_interval: float = 10.0,
+                 metrics_file: Optional[Path] = None):
+        self.path = path
+        self.max_instances = max_instances
+        self.timeout = timeout
+        self.reload_interval = reload_interval
+        self.metrics_file = metrics_file
+        self.env: Dict[str, str] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self._queue: list = []
+        self._file_state: Optional[tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tasker-job")
+
+    def _stat(self) -> Optional[tuple[int, int]]:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self) -> None:
+        """(Re)read the crontab file and rebuild the schedule queue."""
+        self._file_state = self._stat()
+        content = self.path.read_text() if self._file_state else ""
+        self.env = parse_env(content)
+
+        entries = {}
+        for job in CronManager().parse_jobs(content):
+            if not job.enabled:
+                continue
+            key = job.original_line
+            try:
+                schedule = schedule_for_job(job)
+                zone = get_zone(job.timezone)
+            except ValueError as e:
+                log.warning("Skipping invalid job %r: %s", key, e)
+                continue
+            entry = self._entries.get(key)
+            if entry is None or entry.zone != zone:
+                entry = _Entry(job=job, schedule=schedule, zone=zone, key=key)
+            entries[key] = entry
+
+        with self._lock:
+            self._entries = entries
+            now = datetime.now(timezone.utc)
+            self._queue = []
+            for entry in entries.values():
+                self._push(entry, now)
+        log.info("Loaded %d job(s) from %s", len(entries), self.path)
+
+    def _push(self, entry: _Entry, after: datetime) -> None:
+        when = next_fire(entry.schedule, after, entry.zone)
+        if when is not None:
+            heapq.heappush(self._queue, (when, id(entry), entry))
+
+    def _maybe_reload(self) -> None:
+        if self._stat() != self._file_state:
+            self._reload()
+
+    def _reload(self) -> None:
+        """load(), keeping the current jobs if the file cannot be read."""
+        try:
+            self.load()
+        except (OSError, ValueError) as e:
+            # load() already recorded the file state, so this is retried once the file changes
+            log.error("Failed to load %s, keeping the previous jobs: %s", self.path, e)
+
+    def run_forever(self) -> None:
+        self._reload()
+        while not self._stopped:
+            self._maybe_reload()
+            now = datetime.now(timezone.utc)
+            with self._lock:
+                while self._queue and self._queue[0][0] <= now:
+                    _, _, entry = heapq.heappop(self._queue)
+                    self._dispatch(entry)
+                    # Schedule from now so a late wake-up does not cause a burst
+                    self._push(entry, now)
+                delay = (self._queue[0][0] - now).total_seconds() if self._queue else None
+            if self.reload_interval and (delay is None or delay > self.reload_interval):
+                delay = self.reload_interval
+            self._wake.wait(delay)
+            self._wake.clear()
+        self._pool.shutdown(wait=True)
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+
+    def request_reload(self) -> None:
+        self._file_state = None
+        self._wake.set()
+
+    def _dispatch(self, entry: _Entry) -> None:
+        if entry.running >= self.max_instances:
+            entry.stats.skipped += 1
+            log.warning("Skipping %r: %d instance(s) still running", entry.key, entry.running)
+            return
+        entry.running += 1
+        self._pool.submit(self._execute, entry)
+
+    def _execute(self, entry: _Entry) -> None:
+        command, stdin = split_command(entry.job.command)
+        env = dict(os.environ)
+        env.update(self.env)
+        # Like cron, ignore the invoking user's login shell unless the crontab sets SHELL
+        shell = self.env.get("SHELL", "/bin/sh")
+        started = time.monotonic()
+        entry.stats.last_started = datetime.now().isoformat(timespec="seconds")
+        exit_code = None
+        timed_out = False
+        try:
+            # Own session, so a timeout can kill everything the shell started
+            proc = subprocess.Popen(
+                [shell, "-c", command],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env=env,
+                cwd=env.get("HOME"),
+                start_new_session=True,
+            )
+        except OSError as e:
+            proc = None
+            log.error("Failed to start %r: %s", entry.key, e)
+        if proc is not None:
+            try:
+                stdout, stderr = proc.communicate(stdin, timeout=self.timeout)
+                exit_code = proc.returncode
+                output = (stdout + stderr).strip()
+                if output:
+                    log.info("Output of %r:\n%s", entry.key, output)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                log.error("Job %r timed out after %ss", entry.key, self.timeout)
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                proc.communicate()
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            entry.running -= 1
+            stats = entry.stats
+            stats.runs += 1
+            stats.total_seconds += elapsed
+            stats.last_exit = exit_code
+            if timed_out:
+                stats.timeouts += 1
+            elif exit_code != 0:
+                stats.failures += 1
+            self._write_metrics()
+
+    def metrics(self) -> dict:
+        """Return per-job counters keyed by crontab line."""
+        return {key: vars(entry.stats) for key, entry in self._entries.items()}
+
+    def _write_metrics(self) -> None:
+        if not self.metrics_file:
+            return
+        tmp_path = self.metrics_file.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.metrics(), indent=2))
+        os.replace(tmp_path, self.metrics_file)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for `tasker run`."""
+    parser = argparse.ArgumentParser(prog="tasker run", description="Run crontab jobs without a cron daemon.")
+    parser.add_argument("crontab", type=Path, help="crontab file to run")
+    parser.add_argument("--workers", type=int, default=4, help="maximum jobs running at once (default: 4)")
+    parser.add_argument("--max-instances", type=int, default=1,
+                        help="maximum concurrent runs of the same job (default: 1)")
+    parser.add_argument("--timeout", type=float, default=None, help="kill jobs running longer than this many seconds")
+    parser.add_argument("--reload-interval", type=float, default=10.0,
+                        help="seconds between checks for crontab changes (default: 10)")
+    parser.add_argument("--metrics-file", type=Path, default=None, help="write job counters to this JSON file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    runner = CronRunner(
+        args.crontab,
+        max_workers=args.workers,
+        max_instances=args.max_instances,
+        timeout=args.timeout,
+        reload_interval=args.reload_interval,
+        metrics_file=args.metrics_file,
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: runner.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: runner.stop())
+    signal.signal(signal.SIGHUP, lambda signum, frame: runner.request_reload())
+    runner.run_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
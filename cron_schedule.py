@@ -0,0 +1,433 @@
+"""Cron schedule evaluation.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+MONTH_NAMES = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+DAY_NAMES = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+
+# (name, lowest value, highest value, accepted names) in crontab column order
+FIELDS = (
+    ("minute", 0, 59, {}),
+    ("hour", 0, 23, {}),
+    ("day_of_month", 1, 31, {}),
+    ("month", 1, 12, MONTH_NAMES),
+    ("day_of_week", 0, 7, DAY_NAMES),
+)
+FIELD_LABELS = ("Minute", "Hour", "Day of month", "Month", "Day of week")
+
+# Give up looking for a match after this many years (covers Feb 29 on a given weekday)
+SEARCH_YEARS = 28
+
+
+def _next_bit(mask: int, start: int) -> int:
+    """Return the lowest set bit of mask at or above start, or -1."""
+    shifted = mask >> start
+    if not shifted:
+        return -1
+    return start + (shifted & -shifted).bit_length() - 1
+
+
+class ScheduleError(ValueError):
+    """Invalid schedule field. `field` is the CronJob attribute name at fault."""
+
+    def __init__(self, field: str, message: str):
+        super().__init__(message)
+        self.field = field
+
+
+def _parse_value(index: int, text: str) -> int:
+    name, low, high, names = FIELDS[index]
+    label = FIELD_LABELS[index]
+    value = names.get(text.lower())
+    if value is not None:
+        return value
+    # isdigit alone accepts digits like '²' that int() rejects
+    if not (text.isascii() and text.isdigit()):
+        if not text:
+            raise ScheduleError(name, f"{label}: missing value")
+        kind = f"number or {label.lower()} name" if names else "number"
+        raise ScheduleError(name, f"{label}: {text!r} is not a {kind}")
+    value = int(text)
+    if value < low or value > high:
+        raise ScheduleError(name, f"{label}: {value} is outside {low}-{high}")
+    return value
+
+
+@lru_cache(maxsize=4096)
+def parse_field(index: int, text: str) -> int:
+    """Compile one schedule field into a bitmask of allowed values.
+
+    Raises ScheduleError describing the first problem found.
+    """
+    name, low, high, _ = FIELDS[index]
+    label = FIELD_LABELS[index]
+    if not text:
+        raise ScheduleError(name, f"{label} is empty")
+    mask = 0
+    for item in text.split(","):
+        range_part, has_step, step_part = item.partition("/")
+        step = 1
+        if has_step:
+            if not (step_part.isascii() and step_part.isdigit()) or int(step_part) < 1:
+                raise ScheduleError(name, f"{label}: step {step_part!r} must be a positive number")
+            step = int(step_part)
+        if range_part in ("*", "?"):
+            start, end = low, high
+        elif "-" in range_part:
+            start_text, end_text = range_part.split("-", 1)
+            start, end = _parse_value(index, start_text), _parse_value(index, end_text)
+            if start > end:
+                raise ScheduleError(name, f"{label}: range {range_part} runs backwards")
+        else:
+            start = _parse_value(index, range_part)
+            end = high if has_step else start
+        for value in range(start, end + 1, step):
+            mask |= 1 << value
+    if index == 4 and mask & (1 << 7):
+        # 7 is an alias for Sunday
+        mask = (mask | 1) & ~(1 << 7)
+    return mask
+
+
+@lru_cache(maxsize=4096)
+def field_error(index: int, text: str) -> Optional[str]:
+    """Return why a schedule field is invalid, or None. Cheap enough for every keystroke."""
+    try:
+        parse_field(index, text)
+    except ScheduleError as e:
+        return str(e)
+    return None
+
+
+def validate_schedule(minute: str, hour: str, day_of_month: str,
+                      month: str, day_of_week: str) -> Dict[str, str]:
+    """Check all five fields. Returns {field name: error message} for bad fields."""
+    errors = {}
+    for index, text in enumerate((minute, hour, day_of_month, month, day_of_week)):
+        error = field_error(index, text)
+        if error:
+            errors[FIELDS[index][0]] = error
+    return errors
+
+
+@dataclass(frozen=True)
+class CronSchedule:
+    """Compiled cron schedule; each field is a bitmask of allowed values."""
+    minutes: int
+    hours: int
+    days: int
+    months: int
+    weekdays: int
+    dom_restricted: bool
+    dow_restricted: bool
+    # Minute or hour starts with "*"; such jobs also run in a repeated DST hour
+    time_wildcard: bool = False
+
+    def _day_matches(self, when: datetime) -> bool:
+        dom_ok = bool(self.days >> when.day & 1)
+        dow_ok = bool(self.weekdays >> (when.isoweekday() % 7) & 1)
+        # Like cron: when both day fields are restricted, either one may match
+        if self.dom_restricted and self.dow_restricted:
+            return dom_ok or dow_ok
+        return dom_ok and dow_ok
+
+    def matches(self, when: datetime) -> bool:
+        return (bool(self.minutes >> when.minute & 1) and
+                bool(self.hours >> when.hour & 1) and
+                bool(self.months >> when.month & 1) and
+                self._day_matches(when))
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        """Return the first matching minute strictly after the given time."""
+        when = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = when.year + SEARCH_YEARS
+        while when.year <= limit:
+            if not self.months >> when.month & 1:
+                month = _next_bit(self.months, when.month + 1)
+                if month < 0:
+                    when = when.replace(year=when.year + 1, month=1, day=1, hour=0, minute=0)
+                else:
+                    when = when.replace(month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(when):
+                when = when.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            hour = _next_bit(self.hours, when.hour)
+            if hour < 0:
+                when = when.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if hour != when.hour:
+                when = when.replace(hour=hour, minute=0)
+            minute = _next_bit(self.minutes, when.minute)
+            if minute < 0:
+                when = when.replace(minute=0) + timedelta(hours=1)
+                continue
+            return when.replace(minute=minute)
+        return None
+
+
+@lru_cache(maxsize=1024)
+def compile_schedule(minute: str, hour: str, day_of_month: str,
+                     month: str, day_of_week: str) -> CronSchedule:
+    """Compile five crontab fields. Raises ScheduleError if any field is invalid."""
+    return CronSchedule(
+        minutes=parse_field(0, minute),
+        hours=parse_field(1, hour),
+        days=parse_field(2, day_of_month),
+        months=parse_field(3, month),
+        weekdays=parse_field(4, day_of_week),
+        dom_restricted=not day_of_month.startswith("*"),
+        dow_restricted=not day_of_week.startswith("*"),
+        time_wildcard=minute.startswith("*") or hour.startswith("*"),
+    )
+
+
+def schedule_for_job(job) -> CronSchedule:
+    """Compile the schedule of a CronJob, reusing one it was loaded with."""
+    compiled = getattr(job, "compiled", None)
+    if compiled is not None:
+        return compiled
+    return compile_schedule(job.minute, job.hour, job.day_of_month, job.month, job.day_of_week)
+
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: Optional[str] = None) -> tzinfo:
+    """Return the zone named by a CRON_TZ/TZ value, or the system zone for None."""
+    if name:
+        try:
+            return ZoneInfo(name.lstrip(":"))
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ScheduleError("timezone", f"Unknown timezone {name!r}") from None
+    tz_env = os.environ.get("TZ")
+    if tz_env:
+        try:
+            return ZoneInfo(tz_env.lstrip(":"))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    try:
+        with open("/etc/localtime", "rb") as f:
+            return ZoneInfo.from_file(f, key="localtime")
+    except (OSError, ValueError):
+        return timezone.utc
+
+
+@lru_cache(maxsize=256)
+def zone_transitions(zone: tzinfo, year: int) -> tuple[tuple[datetime, timedelta, timedelta], ...]:
+    """UTC offset changes of a zone around a year, as (UTC instant, offset before, offset after).
+
+    Computed once per zone and year, so bulk next-run computations only pay for
+    the tz rules the first time a zone is seen.
+    """
+    when = datetime(year, 1, 1, tzinfo=timezone.utc) - timedelta(days=1)
+    end = datetime(year + 1, 1, 1, tzinfo=timezone.utc) + timedelta(days=1)
+    offset = when.astimezone(zone).utcoffset()
+    transitions = []
+    while when < end:
+        step_end = when + timedelta(hours=1)
+        step_offset = step_end.astimezone(zone).utcoffset()
+        if step_offset != offset:
+            low, high = when, step_end
+            while high - low > timedelta(minutes=1):
+                middle = low + timedelta(minutes=(high - low) // timedelta(minutes=1) // 2)
+                if middle.astimezone(zone).utcoffset() == offset:
+                    low = middle
+                else:
+                    high = middle
+            transitions.append((high, offset, step_offset))
+            offset = step_offset
+        when = step_end
+    return tuple(transitions)
+
+
+def _gap_end(zone: tzinfo, wall: datetime, earliest: datetime, latest: datetime) -> datetime:
+    """Return the instant a DST gap containing a skipped wall-clock time ends."""
+    for instant, _, _ in zone_transitions(zone, wall.year):
+        if earliest < instant <= latest:
+            return instant
+    return latest
+
+
+def _next_in_repeated_hour(schedule: CronSchedule, after: datetime, zone: tzinfo) -> Optional[datetime]:
+    """First fire of a wildcard schedule during the second pass of a DST overlap."""
+    for year in (after.year, after.year + 1):
+        for instant, before, later in zone_transitions(zone, year):
+            window_end = instant + (before - later)
+            if later >= before or window_end <= after:
+                continue
+            wall = instant.astimezone(zone).replace(tzinfo=None) - timedelta(minutes=1)
+            while True:
+                wall = schedule.next_after(wall)
+                if wall is None:
+                    break
+                fire = wall.replace(tzinfo=zone, fold=1).astimezone(timezone.utc)
+                if fire >= window_end:
+                    break
+                if fire > after:
+                    return fire
+            return None
+    return None
+
+
+def next_fire(schedule: CronSchedule, after: datetime, zone: tzinfo) -> Optional[datetime]:
+    """Return the first fire time (in UTC) strictly after an aware datetime.
+
+    Schedules are evaluated on the wall clock of `zone`. Like cronie, times
+    skipped by a DST gap fire as soon as the clock jumps, and in a repeated
+    hour fixed-time jobs fire once while wildcard jobs fire in both passes.
+    """
+    after = after.astimezone(timezone.utc)
+    wall = after.astimezone(zone).replace(tzinfo=None)
+    repeated = _next_in_repeated_hour(schedule, after, zone) if schedule.time_wildcard else None
+    while True:
+        wall = schedule.next_after(wall)
+        if wall is None:
+            return repeated
+        first = wall.replace(tzinfo=zone, fold=0).astimezone(timezone.utc)
+        second = wall.replace(tzinfo=zone, fold=1).astimezone(timezone.utc)
+        if first > second:
+            # Skipped wall time: fire at the end of the gap
+            fire = _gap_end(zone, wall, second, first)
+        elif first <= after and first < second and schedule.time_wildcard:
+            fire = second
+        else:
+            fire = first
+        if fire > after:
+            break
+    if repeated is not None and repeated < fire:
+        return repeated
+    return fire
+
+
+MONTH_LABELS = ("", "January", "February", "March", "April", "May", "June", "July",
+                "August", "September", "October", "November", "December")
+DAY_LABELS = ("Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
+
+STEP_RE = re.compile(r'^\*/(\d+)$')
+
+
+def _mask_values(mask: int) -> List[int]:
+    return [value for value in range(mask.bit_length()) if mask >> value & 1]
+
+
+def _join(items: List[str]) -> str:
+    if len(items) == 1:
+        return items[0]
+    return ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def _describe_values(mask: int, labels=None) -> str:
+    """Describe a set of values, collapsing runs of three or more into ranges."""
+    values = _mask_values(mask)
+    label = (lambda value: labels[value]) if labels else str
+    runs = []
+    for value in values:
+        if runs and runs[-1][1] == value - 1:
+            runs[-1][1] = value
+        else:
+            runs.append([value, value])
+    items = []
+    for start, end in runs:
+        if end - start >= 2:
+            items.append(f"{label(start)} through {label(end)}")
+        else:
+            items.extend(label(value) for value in range(start, end + 1))
+    return _join(items)
+
+
+def _describe_time(minute: str, hour: str, schedule: CronSchedule) -> str:
+    minutes = _mask_values(schedule.minutes)
+    hours = _mask_values(schedule.hours)
+    minute_step = STEP_RE.match(minute)
+    hour_step = STEP_RE.match(hour)
+
+    if not (minute.startswith("*") or hour.startswith("*")) and len(minutes) * len(hours) <= 4:
+        return "At " + _join([f"{h:02d}:{m:02d}" for h in hours for m in minutes])
+
+    if minute == "*":
+        text = "Every minute"
+    elif minute_step:
+        text = f"Every {minute_step.group(1)} minutes"
+    else:
+        plural = "minutes" if len(minutes) > 1 else "minute"
+        text = f"At {plural} {_describe_values(schedule.minutes)}"
+
+    if hour == "*":
+        if minute != "*" and not minute_step:
+            text += " past every hour"
+    elif hour_step:
+        text += f" past every {hour_step.group(1)} hours"
+    else:
+        plural = "hours" if len(hours) > 1 else "hour"
+        text += f" during {plural} {_describe_values(schedule.hours)}"
+    return text
+
+
+@lru_cache(maxsize=512)
+def describe_schedule(minute: str, hour: str, day_of_month: str,
+                      month: str, day_of_week: str) -> str:
+    """Describe a schedule in plain English, e.g. "At 02:30 on Monday through Friday"."""
+    schedule = compile_schedule(minute, hour, day_of_month, month, day_of_week)
+    text = _describe_time(minute, hour, schedule)
+
+    day_parts = []
+    if schedule.dom_restricted:
+        plural = "days" if len(_mask_values(schedule.days)) > 1 else "day"
+        day_parts.append(f"on {plural} {_describe_values(schedule.days)} of the month")
+    elif STEP_RE.match(day_of_month):
+        day_parts.append(f"every {STEP_RE.match(day_of_month).group(1)} days")
+    if schedule.dow_restricted or STEP_RE.match(day_of_week):
+        day_parts.append(f"on {_describe_values(schedule.weekdays, DAY_LABELS)}")
+    if day_parts:
+        # Cron fires when either day field matches only if both are restricted;
+        # a */n field is not restricted and must match as well
+        joiner = " or " if schedule.dom_restricted and schedule.dow_restricted else " and "
+        text += " " + joiner.join(day_parts)
+
+    if month != "*":
+        text += f" in {_describe_values(schedule.months, MONTH_LABELS)}"
+    return text
+
+
+@lru_cache(maxsize=512)
+def next_runs(minute: str, hour: str, day_of_month: str, month: str, day_of_week: str,
+              count: int, after: datetime, zone_name: Optional[str] = None) -> tuple[datetime, ...]:
+    """Return the next `count` fire times after an aware, minute-aligned datetime.
+
+    Times are evaluated in the named zone (the system zone for None) and
+    returned in that zone.
+    """
+    schedule = compile_schedule(minute, hour, day_of_month, month, day_of_week)
+    zone = get_zone(zone_name)
+    runs = []
+    when = after
+    while len(runs) < count:
+        when = next_fire(schedule, when, zone)
+        if when is None:
+            break
+        runs.append(when.astimezone(zone))
+    return tuple(runs)
@@ -0,0 +1,299 @@
+"""Reading system crontab files through a persistent parse cache.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+/etc/crontab, /etc/cron.d/* and the per-user spool files are parsed once
+and stored in a binary cache file keyed by (path, mtime, size). Files that
+have not changed since are loaded from the memory-mapped cache, with their
+compiled schedules, instead of being parsed again.
+
+Cache layout (little endian):
+    header   magic "TKPC", version, file count, job count, string blob offset
+    files    path ref, mtime_ns, size, first job index, job count
+    jobs     schedule bitmasks and flags, then a string ref per text field
+    strings  deduplicated UTF-8 blob; a ref is (offset, length), length
+             NONE_LENGTH standing for None
+"""
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cron_manager import CronJob, CronManager
+from cron_schedule import CronSchedule, ScheduleError, schedule_for_job
+from perf_trace import tracer
+
+SYSTEM_CRONTAB = Path("/etc/crontab")
+CRON_D = Path("/etc/cron.d")
+# Debian keeps user crontabs in crontabs/, cronie (Fedora, Arch) directly in /var/spool/cron
+SPOOL_DIRS = (Path("/var/spool/cron/crontabs"), Path("/var/spool/cron"))
+
+MAGIC = b"TKPC"
+CACHE_VERSION = 2  # 1 stored spool owners as the user column
+HEADER = struct.Struct("<4sHHIIQ")
+FILE_RECORD = struct.Struct("<IIqQII")
+# minutes, hours, days, months, weekdays, flags, then (offset, length) for each of JOB_STRINGS
+JOB_STRINGS = ("minute", "hour", "day_of_month", "month", "day_of_week",
+               "command", "comment", "original_line", "timezone", "user")
+JOB_RECORD = struct.Struct("<QIIHBB" + "II" * len(JOB_STRINGS))
+NONE_LENGTH = 0xFFFFFFFF
+
+FLAG_DOM_RESTRICTED = 1
+FLAG_DOW_RESTRICTED = 2
+FLAG_TIME_WILDCARD = 4
+FLAG_ENABLED = 8
+FLAG_COMPILED = 16  # bitmasks are valid; unset for jobs with an invalid schedule
+
+
+def cache_path() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "tasker" / "parse-cache.bin"
+
+
+def crontab_files() -> List[Tuple[Path, bool]]:
+    """List the system crontab files as (path, has user column)."""
+    files = []
+    if SYSTEM_CRONTAB.is_file():
+        files.append((SYSTEM_CRONTAB, True))
+    try:
+        # Hidden files (.placeholder) and editor backups are not crontabs
+        files.extend((path, True) for path in sorted(CRON_D.iterdir())
+                     if path.is_file() and not path.name.startswith(".") and not path.name.endswith("~"))
+    except OSError:
+        pass
+    for spool in SPOOL_DIRS:
+        try:
+            files.extend((path, False) for path in sorted(spool.iterdir()) if path.is_file())
+        except OSError:
+            continue
+        break
+    return files
+
+
+@dataclass
+class _CachedFile:
+    mtime_ns: int
+    size: int
+    first_job: int
+    job_count: int
+
+
+class ParseCache:
+    """Parsed jobs per crontab file, persisted between runs."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or cache_path()
+        self._mmap: Optional[mmap.mmap] = None
+        self._files: Dict[str, _CachedFile] = {}
+        self._strings_offset = 0
+        self._loaded = False
+        self._decoded_strings: Dict[int, str] = {}
+        self._decoded_schedules: Dict[tuple, CronSchedule] = {}
+        # Jobs decoded or parsed in this process, so repeated loads are free
+        self._memory: Dict[str, Tuple[int, int, List[CronJob]]] = {}
+        self._dirty = False
+
+    def _open(self) -> None:
+        self._loaded = True
+        try:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Missing or empty cache file
+            return
+        try:
+            magic, version, _, file_count, _, strings_offset = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != CACHE_VERSION:
+                raise ValueError("unknown cache format")
+            self._strings_offset = strings_offset
+            for i in range(file_count):
+                path_offset, path_length, mtime_ns, size, first_job, job_count = FILE_RECORD.unpack_from(
+                    self._mmap, HEADER.size + i * FILE_RECORD.size)
+                path = self._string(path_offset, path_length)
+                self._files[path] = _CachedFile(mtime_ns, size, first_job, job_count)
+        except (struct.error, ValueError, UnicodeDecodeError):
+            # A corrupt or outdated cache is simply rebuilt
+            self._files = {}
+            self._mmap.close()
+            self._mmap = None
+
+    def _string(self, offset: int, length: int) -> Optional[str]:
+        if length == NONE_LENGTH:
+            return None
+        start = self._strings_offset + offset
+        return self._mmap[start:start + length].decode()
+
+    def _decode_jobs(self, path: str, entry: _CachedFile) -> List[CronJob]:
+        jobs_offset = HEADER.size + len(self._files) * FILE_RECORD.size + entry.first_job * JOB_RECORD.size
+        view = memoryview(self._mmap)[jobs_offset:jobs_offset + entry.job_count * JOB_RECORD.size]
+        blob = self._strings_offset
+        mm = self._mmap
+        # Strings are deduplicated in the file, so a ref identifies one string everywhere
+        strings = self._decoded_strings
+        schedules = self._decoded_schedules
+        jobs = []
+        for record in JOB_RECORD.iter_unpack(view):
+            values = []
+            for i in range(6, 6 + 2 * len(JOB_STRINGS), 2):
+                offset, length = record[i], record[i + 1]
+                if length == NONE_LENGTH:
+                    values.append(None)
+                    continue
+                text = strings.get(offset)
+                if text is None:
+                    text = strings[offset] = mm[blob + offset:blob + offset + length].decode()
+                values.append(text)
+            minute, hour, day_of_month, month, day_of_week, command, comment, original_line, timezone, user = values
+
+            flags = record[5]
+            compiled = None
+            if flags & FLAG_COMPILED:
+                key = record[:6]
+                compiled = schedules.get(key)
+                if compiled is None:
+                    compiled = schedules[key] = CronSchedule(
+                        minutes=record[0],
+                        hours=record[1],
+                        days=record[2],
+                        months=record[3],
+                        weekdays=record[4],
+                        dom_restricted=bool(flags & FLAG_DOM_RESTRICTED),
+                        dow_restricted=bool(flags & FLAG_DOW_RESTRICTED),
+                        time_wildcard=bool(flags & FLAG_TIME_WILDCARD),
+                    )
+            jobs.append(CronJob(minute, hour, day_of_month, month, day_of_week, command, comment,
+                                original_line, timezone, bool(flags & FLAG_ENABLED), path, user, compiled))
+        view.release()
+        return jobs
+
+    def jobs(self, path: Path, with_user: bool) -> List[CronJob]:
+        """Return the jobs of a crontab file, parsing it only if it changed."""
+        key = str(path)
+        stat = path.stat()
+        memory = self._memory.get(key)
+        if memory and memory[:2] == (stat.st_mtime_ns, stat.st_size):
+            return memory[2]
+
+        if not self._loaded:
+            self._open()
+        cached = self._files.get(key)
+        if cached and (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+            with tracer.span("cache.decode", path=key):
+                jobs = self._decode_jobs(key, cached)
+        else:
+            with tracer.span("cache.parse", path=key):
+                jobs = CronManager().parse_jobs(path.read_text(errors="replace"), with_user=with_user)
+                for job in jobs:
+                    job.source = key
+                    try:
+                        job.compiled = schedule_for_job(job)
+                    except ScheduleError:
+                        pass
+            self._dirty = True
+        self._memory[key] = (stat.st_mtime_ns, stat.st_size, jobs)
+        return jobs
+
+    def prune(self, paths: Iterable[Path]) -> None:
+        """Forget files that are no longer present."""
+        keep = {str(path) for path in paths}
+        for key in list(self._memory):
+            if key not in keep:
+                del self._memory[key]
+                self._dirty = True
+        if not self._loaded:
+            self._open()
+        if any(key not in keep for key in self._files):
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write every file loaded in this process to the cache, if anything changed."""
+        if not self._dirty:
+            return
+        strings: Dict[str, Tuple[int, int]] = {}
+        blob = bytearray()
+
+        def ref(text: Optional[str]) -> Tuple[int, int]:
+            if text is None:
+                return 0, NONE_LENGTH
+            found = strings.get(text)
+            if found is None:
+                data = text.encode()
+                found = strings[text] = (len(blob), len(data))
+                blob.extend(data)
+            return found
+
+        file_records = []
+        job_records = []
+        for key, (mtime_ns, size, jobs) in self._memory.items():
+            file_records.append(FILE_RECORD.pack(*ref(key), mtime_ns, size, len(job_records), len(jobs)))
+            for job in jobs:
+                schedule = job.compiled
+                flags = FLAG_ENABLED if job.enabled else 0
+                masks = (0, 0, 0, 0, 0)
+                if schedule is not None:
+                    masks = (schedule.minutes, schedule.hours, schedule.days, schedule.months, schedule.weekdays)
+                    flags |= FLAG_COMPILED
+                    flags |= FLAG_DOM_RESTRICTED if schedule.dom_restricted else 0
+                    flags |= FLAG_DOW_RESTRICTED if schedule.dow_restricted else 0
+                    flags |= FLAG_TIME_WILDCARD if schedule.time_wildcard else 0
+                refs = []
+                for name in JOB_STRINGS:
+                    refs.extend(ref(getattr(job, name)))
+                job_records.append(JOB_RECORD.pack(*masks, flags, *refs))
+
+        strings_offset = HEADER.size + len(file_records) * FILE_RECORD.size + len(job_records) * JOB_RECORD.size
+        header = HEADER.pack(MAGIC, CACHE_VERSION, 0, len(file_records), len(job_records), strings_offset)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            f.write(b"".join(file_records))
+            f.write(b"".join(job_records))
+            f.write(blob)
+        # Readers keep their old mapping; the new file replaces it atomically
+        os.replace(temp_path, self.path)
+        self._dirty = False
+
+
+def load_system_jobs(cache: Optional[ParseCache] = None) -> List[CronJob]:
+    """Read jobs from /etc/crontab, /etc/cron.d and the user spools that are readable.
+
+    Jobs from spool files get the file name as owner. Unreadable files are skipped.
+    """
+    cache = cache or ParseCache()
+    files = crontab_files()
+    jobs: List[CronJob] = []
+    loaded = []
+    for path, with_user in files:
+        try:
+            file_jobs = cache.jobs(path, with_user)
+        except OSError:
+            continue
+        if not with_user:
+            # The spool file is named after its owner; user stays None so the line is unchanged
+            for job in file_jobs:
+                job.owner = path.name
+        jobs.extend(file_jobs)
+        loaded.append(path)
+    cache.prune(loaded)
+    try:
+        cache.save()
+    except OSError:
+        pass
+    return jobs
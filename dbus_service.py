@@ -0,0 +1,292 @@
+"""D-Bus interface to Tasker's crontab management.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+The me.arbaoui.tasker.Crontab interface is exported on the session bus at
+/me/arbaoui/tasker, by the GUI while it runs and otherwise by
+`tasker service`, which the GUI replaces when it starts. Both serve it from
+one CrontabService that keeps a long-lived CronManager per crontab and
+caches the parsed jobs for a couple of seconds, so clients polling List do
+not each spawn `crontab -l`.
+
+The system crontab is not served over D-Bus: reading and writing it goes
+through the GUI's sudo credentials, which other clients on the bus must not
+borrow. While registered on a bus, the service also re-reads the user
+crontab every few seconds, so JobsChanged reports edits made with
+`crontab -e` or by scripts without anyone having to call List.
+
+To try it against a private bus:
+
+    dbus-run-session -- sh -c 'tasker service & sleep 1; gdbus call --session \\
+        --dest me.arbaoui.tasker --object-path /me/arbaoui/tasker \\
+        --method me.arbaoui.tasker.Crontab.List false'
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import gi
+
+gi.require_version("Gio", "2.0")
+from gi.repository import Gio, GLib
+
+from cron_formats import JOB_FIELDS, job_from_dict
+from cron_manager import CronJob, CronManager
+from cron_schedule import next_runs
+
+BUS_NAME = "me.arbaoui.tasker"
+OBJECT_PATH = "/me/arbaoui/tasker"
+INTERFACE_NAME = "me.arbaoui.tasker.Crontab"
+ERROR_FAILED = "me.arbaoui.tasker.Error.Failed"
+ERROR_INVALID_ARGS = "org.freedesktop.DBus.Error.InvalidArgs"
+ERROR_ACCESS_DENIED = "org.freedesktop.DBus.Error.AccessDenied"
+
+# How long List may answer from the cached jobs before reading the crontab again
+CACHE_TTL = 2.0
+# How often the user crontab is re-read to notice changes made outside Tasker
+WATCH_INTERVAL = 5
+
+INTERFACE_XML = f"""
+<node>
+  <interface name="{INTERFACE_NAME}">
+    <method name="List">
+      <arg type="b" name="system" direction="in"/>
+      <arg type="aa{{sv}}" name="jobs" direction="out"/>
+    </method>
+    <method name="ApplyBatch">
+      <arg type="b" name="system" direction="in"/>
+      <arg type="a(sa{{sv}})" name="operations" direction="in"/>
+      <arg type="u" name="applied" direction="out"/>
+    </method>
+    <method name="NextRuns">
+      <arg type="s" name="schedule" direction="in"/>
+      <arg type="s" name="timezone" direction="in"/>
+      <arg type="u" name="count" direction="in"/>
+      <arg type="ax" name="times" direction="out"/>
+    </method>
+    <signal name="JobsChanged">
+      <arg type="b" name="system"/>
+    </signal>
+  </interface>
+</node>
+"""
+
+# Upper bound on NextRuns' count, so one call cannot keep the service busy
+MAX_NEXT_RUNS = 1000
+
+
+def job_to_variant(job: CronJob) -> Dict[str, GLib.Variant]:
+    return {
+        "minute": GLib.Variant("s", job.minute),
+        "hour": GLib.Variant("s", job.hour),
+        "day_of_month": GLib.Variant("s", job.day_of_month),
+        "month": GLib.Variant("s", job.month),
+        "day_of_week": GLib.Variant("s", job.day_of_week),
+        "command": GLib.Variant("s", job.command),
+        "comment": GLib.Variant("s", job.comment or ""),
+        "timezone": GLib.Variant("s", job.timezone or ""),
+        "enabled": GLib.Variant("b", job.enabled),
+        "tags": GLib.Variant("as", job.tags),
+        "original_line": GLib.Variant("s", job.original_line or ""),
+    }
+
+
+def job_from_variant(op: str, data: dict, position: int) -> CronJob:
+    """Build the job of a batch operation from an unpacked a{sv} dict."""
+    for name, value in data.items():
+        expected = bool if name == "enabled" else str
+        if name in JOB_FIELDS + ("original_line",) and not isinstance(value, expected):
+            raise ValueError(f"Entry {position}: {name} must be a {'boolean' if expected is bool else 'string'}")
+    if op == "add":
+        return job_from_dict(data, position)
+    # Existing jobs are matched by original_line, or by schedule and command
+    original_line = data.get("original_line") or None
+    if not original_line and not data.get("command"):
+        raise ValueError(f"Entry {position}: original_line or schedule and command required")
+    return CronJob(
+        minute=data.get("minute", ""),
+        hour=data.get("hour", ""),
+        day_of_month=data.get("day_of_month", ""),
+        month=data.get("month", ""),
+        day_of_week=data.get("day_of_week", ""),
+        command=data.get("command", ""),
+        original_line=original_line,
+    )
+
+
+class CrontabService:
+    """Serves the Crontab interface from shared, cached CronManagers."""
+
+    def __init__(self):
+        self._managers: Dict[bool, CronManager] = {}
+        # system -> (read at, crontab content, jobs)
+        self._cache: Dict[bool, Tuple[float, Optional[str], List[CronJob]]] = {}
+        self._registrations: List[Tuple[Gio.DBusConnection, int]] = []
+        # In-process callbacks for changes made over D-Bus or found on a re-read,
+        # not for writes made directly through manager()
+        self.listeners: List[Callable[[bool], None]] = []
+        self.on_call: Optional[Callable[[], None]] = None
+        self._watch_id: Optional[int] = None
+
+    def manager(self, system: bool) -> CronManager:
+        """The long-lived CronManager of a crontab, shared with the GUI."""
+        manager = self._managers.get(system)
+        if manager is None:
+            manager = self._managers[system] = CronManager(is_system=system)
+            manager.on_change = lambda: self._changed(system)
+        return manager
+
+    def jobs(self, system: bool) -> List[CronJob]:
+        cached = self._cache.get(system)
+        if cached and time.monotonic() - cached[0] < CACHE_TTL:
+            return cached[2]
+        manager = self.manager(system)
+        jobs = manager.get_jobs()
+        self._cache[system] = (time.monotonic(), manager._last_read, jobs)
+        if cached and cached[1] != manager._last_read:
+            # Changed outside Tasker since we last looked
+            self._emit(system)
+            self._notify(system)
+        return jobs
+
+    def _changed(self, system: bool) -> None:
+        """Called after every write through one of our managers."""
+        self._cache.pop(system, None)
+        self._emit(system)
+
+    def _emit(self, system: bool) -> None:
+        for connection, _ in self._registrations:
+            connection.emit_signal(None, OBJECT_PATH, INTERFACE_NAME, "JobsChanged", GLib.Variant("(b)", (system,)))
+
+    def _notify(self, system: bool) -> None:
+        for listener in self.listeners:
+            listener(system)
+
+    def register(self, connection: Gio.DBusConnection) -> bool:
+        interface = Gio.DBusNodeInfo.new_for_xml(INTERFACE_XML).interfaces[0]
+        registration_id = connection.register_object(OBJECT_PATH, interface, self._on_method_call, None, None)
+        self._registrations.append((connection, registration_id))
+        if self._watch_id is None:
+            self._watch_id = GLib.timeout_add_seconds(WATCH_INTERVAL, self._watch)
+        return True
+
+    def unregister(self, connection: Gio.DBusConnection) -> None:
+        for registered, registration_id in list(self._registrations):
+            if registered == connection:
+                connection.unregister_object(registration_id)
+                self._registrations.remove((registered, registration_id))
+        if not self._registrations and self._watch_id is not None:
+            GLib.source_remove(self._watch_id)
+            self._watch_id = None
+
+    def _watch(self) -> bool:
+        """Re-read the user crontab; jobs() signals if it changed since the last read."""
+        try:
+            self.jobs(False)
+        except (OSError, RuntimeError):
+            pass  # unreadable right now; try again next time
+        return GLib.SOURCE_CONTINUE
+
+    def _on_method_call(self, connection: Gio.DBusConnection, sender: str, object_path: str,
+                        interface_name: str, method_name: str, parameters: GLib.Variant,
+                        invocation: Gio.DBusMethodInvocation) -> None:
+        if self.on_call:
+            self.on_call()
+        try:
+            if method_name in ("List", "ApplyBatch") and parameters.unpack()[0]:
+                invocation.return_dbus_error(ERROR_ACCESS_DENIED, "The system crontab is not available over D-Bus")
+                return
+            if method_name == "List":
+                (system,) = parameters.unpack()
+                result = GLib.Variant("(aa{sv})", ([job_to_variant(job) for job in self.jobs(system)],))
+            elif method_name == "ApplyBatch":
+                system, raw_operations = parameters.unpack()
+                operations = [(op, job_from_variant(op, data, position))
+                              for position, (op, data) in enumerate(raw_operations, start=1)]
+                applied = self.manager(system).apply_batch(operations)
+                if applied:
+                    self._notify(system)
+                result = GLib.Variant("(u)", (applied,))
+            elif method_name == "NextRuns":
+                schedule, zone_name, count = parameters.unpack()
+                fields = schedule.split()
+                if len(fields) != 5:
+                    raise ValueError("schedule must have five fields")
+                after = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+                runs = next_runs(*fields, min(count, MAX_NEXT_RUNS), after, zone_name or None)
+                result = GLib.Variant("(ax)", ([int(when.timestamp()) for when in runs],))
+            else:
+                invocation.return_dbus_error("org.freedesktop.DBus.Error.UnknownMethod", method_name)
+                return
+        except ValueError as e:
+            invocation.return_dbus_error(ERROR_INVALID_ARGS, str(e))
+            return
+        except Exception as e:
+            # Anything else must still answer, or the client waits for its timeout
+            invocation.return_dbus_error(ERROR_FAILED, str(e) or type(e).__name__)
+            return
+        invocation.return_value(result)
+
+
+class TaskerService(Gio.Application):
+    """Headless application that only serves the D-Bus interface.
+
+    It shares its application ID with the GUI, which replaces it on launch;
+    losing the name quits the service.
+    """
+
+    def __init__(self, inactivity_timeout: Optional[float] = None):
+        super().__init__(application_id=BUS_NAME,
+                         flags=Gio.ApplicationFlags.IS_SERVICE | Gio.ApplicationFlags.ALLOW_REPLACEMENT)
+        self.service = CrontabService()
+        self.inactivity_timeout = inactivity_timeout
+        if inactivity_timeout:
+            self.set_inactivity_timeout(int(inactivity_timeout * 1000))
+            # Each call counts as activity and restarts the timeout
+            self.service.on_call = self._on_call
+
+    def _on_call(self) -> None:
+        self.hold()
+        self.release()
+
+    def do_dbus_register(self, connection: Gio.DBusConnection, object_path: str) -> bool:
+        Gio.Application.do_dbus_register(self, connection, object_path)
+        return self.service.register(connection)
+
+    def do_dbus_unregister(self, connection: Gio.DBusConnection, object_path: str) -> None:
+        self.service.unregister(connection)
+        Gio.Application.do_dbus_unregister(self, connection, object_path)
+
+    def do_startup(self) -> None:
+        Gio.Application.do_startup(self)
+        if not self.inactivity_timeout:
+            self.hold()
+
+    def do_activate(self) -> None:
+        pass
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for `tasker service`."""
+    parser = argparse.ArgumentParser(prog="tasker service",
+                                     description="Serve the Tasker D-Bus interface on the session bus.")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="exit after this many idle seconds (default: run until stopped)")
+    args = parser.parse_args(argv)
+
+    app = TaskerService(inactivity_timeout=args.timeout)
+    return app.run([])
@@ -0,0 +1,123 @@
+"""Dialog for browsing and restoring crontab history.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from typing import Optional
+
+import gi
+
+gi.require_version("Gtk", "4.0")
+from gi.repository import Gtk
+
+from cron_history import CronHistory, HistoryVersion
+
+
+class HistoryDialog(Gtk.Dialog):
+    def __init__(self, parent: Gtk.Window, history: CronHistory):
+        super().__init__(title="Crontab History", transient_for=parent, modal=True)
+
+        self.history = history
+        self.selected_version: Optional[int] = None
+
+        self.set_default_size(800, 550)
+
+        content = self.get_content_area()
+        content.set_spacing(12)
+        content.set_margin_top(20)
+        content.set_margin_bottom(20)
+        content.set_margin_start(20)
+        content.set_margin_end(20)
+
+        paned = Gtk.Paned(orientation=Gtk.Orientation.HORIZONTAL)
+        paned.set_vexpand(True)
+        paned.set_position(260)
+        content.append(paned)
+
+        list_scrolled = Gtk.ScrolledWindow()
+        paned.set_start_child(list_scrolled)
+
+        self.version_list = Gtk.ListBox()
+        self.version_list.set_selection_mode(Gtk.SelectionMode.SINGLE)
+        self.version_list.connect("row-selected", self._on_version_selected)
+        list_scrolled.set_child(self.version_list)
+
+        diff_scrolled = Gtk.ScrolledWindow()
+        diff_scrolled.set_hexpand(True)
+        paned.set_end_child(diff_scrolled)
+
+        self.diff_view = Gtk.TextView()
+        self.diff_view.set_editable(False)
+        self.diff_view.set_monospace(True)
+        diff_scrolled.set_child(self.diff_view)
+
+        versions = history.versions()
+        if not versions:
+            empty_label = Gtk.Label(label="No history yet")
+            empty_label.add_css_class("dim-label")
+            empty_label.set_margin_top(24)
+            self.version_list.append(empty_label)
+
+        # Newest first; rows are cheap labels, the diff is only built on selection
+        for entry in reversed(versions):
+            self.version_list.append(self._create_version_row(entry))
+
+        self.add_button("Close", Gtk.ResponseType.CLOSE)
+
+        restore_button = self.add_button("Restore This Version", Gtk.ResponseType.APPLY)
+        restore_button.add_css_class("destructive-action")
+        self.set_response_sensitive(Gtk.ResponseType.APPLY, False)
+
+        self.set_default_response(Gtk.ResponseType.CLOSE)
+
+    def _create_version_row(self, entry: HistoryVersion) -> Gtk.ListBoxRow:
+        row = Gtk.ListBoxRow()
+        row.version = entry.version
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+        box.set_margin_top(6)
+        box.set_margin_bottom(6)
+        box.set_margin_start(6)
+        box.set_margin_end(6)
+        row.set_child(box)
+
+        title_label = Gtk.Label(label=f"Version {entry.version}")
+        title_label.set_xalign(0)
+        title_label.add_css_class("title-4")
+        box.append(title_label)
+
+        detail_label = Gtk.Label(label=f"{entry.timestamp.replace('T', ' ')} · {entry.lines} line(s)")
+        detail_label.set_xalign(0)
+        detail_label.add_css_class("dim-label")
+        box.append(detail_label)
+
+        return row
+
+    def _on_version_selected(self, list_box: Gtk.ListBox, row: Optional[Gtk.ListBoxRow]) -> None:
+        version = getattr(row, "version", None)
+        self.selected_version = version
+        latest = self.history.latest()
+        self.set_response_sensitive(
+            Gtk.ResponseType.APPLY,
+            version is not None and latest is not None and version != latest.version,
+        )
+        if version is None:
+            self.diff_view.get_buffer().set_text("")
+            return
+
+        diff = self.history.diff(version)
+        if not diff:
+            diff = "(no changes from the previous version)"
+        self.diff_view.get_buffer().set_text(diff)
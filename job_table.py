@@ -0,0 +1,210 @@
+"""Dense table view of cron jobs built on Gtk.ColumnView.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Jobs live in a Gio.ListStore of JobItem objects. Filtering and sorting are
+done by Gtk.FilterListModel and Gtk.SortListModel with property-expression
+sorters, so GTK computes one sort key per item instead of calling back into
+Python for every comparison. Cells are plain labels bound when they scroll
+into view, and values such as the next run are computed on first use.
+"""
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+
+import gi
+
+gi.require_version("Gtk", "4.0")
+from gi.repository import Gio, GObject, Gtk, Pango
+
+from cron_analysis import JobAnalysis, analyze_job
+from cron_manager import CronJob
+from cron_schedule import get_zone, next_fire, schedule_for_job
+
+# Sort key for jobs that never run, so they go last
+NEVER = GObject.G_MAXINT64
+
+
+class JobItem(GObject.Object):
+    """A CronJob wrapped for list models, with lazily computed display values."""
+    __gtype_name__ = "TaskerJobItem"
+
+    def __init__(self, job: CronJob, source: str, now: datetime):
+        super().__init__()
+        self.job = job
+        self._source = source
+        self._now = now
+        self._next_run: Optional[int] = None
+        self._analysis: Optional[JobAnalysis] = None
+
+    @GObject.Property(type=str)
+    def schedule(self) -> str:
+        job = self.job
+        return f"{job.minute} {job.hour} {job.day_of_month} {job.month} {job.day_of_week}"
+
+    @GObject.Property(type=str)
+    def command(self) -> str:
+        return self.job.command
+
+    @GObject.Property(type=str)
+    def comment(self) -> str:
+        return self.job.title or ""
+
+    @GObject.Property(type=str)
+    def source(self) -> str:
+        return self.job.source or self._source
+
+    @GObject.Property(type=GObject.TYPE_INT64)
+    def next_run(self) -> int:
+        """Next fire time as a UTC timestamp, NEVER if disabled, invalid or never due."""
+        if self._next_run is None:
+            self._next_run = NEVER
+            if self.job.enabled:
+                try:
+                    when = next_fire(schedule_for_job(self.job), self._now, get_zone(self.job.timezone))
+                except ValueError:
+                    when = None
+                if when is not None:
+                    self._next_run = int(when.timestamp())
+        return self._next_run
+
+    @property
+    def analysis(self) -> JobAnalysis:
+        if self._analysis is None:
+            self._analysis = analyze_job(self.job)
+        return self._analysis
+
+    @GObject.Property(type=float)
+    def cost(self) -> float:
+        return self.analysis.cost
+
+    @GObject.Property(type=str)
+    def search_text(self) -> str:
+        return f"{self.schedule}\n{self.command}\n{self.job.comment or ''}\n{self.source}"
+
+    def cost_text(self) -> str:
+        analysis = self.analysis
+        marker = " ⚠" if analysis.warnings else ""
+        return f"{analysis.cost:g} ({analysis.level}){marker}"
+
+    def next_run_text(self) -> str:
+        if not self.job.enabled:
+            return "Disabled"
+        if self.next_run == NEVER:
+            return "Never"
+        zone = get_zone(self.job.timezone)
+        return datetime.fromtimestamp(self.next_run, zone).strftime("%a %Y-%m-%d %H:%M")
+
+
+class JobTable(Gtk.Box):
+    """Search entry plus a sortable, filterable Gtk.ColumnView of jobs."""
+
+    def __init__(self, on_activate: Callable[[CronJob], None]):
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        self.on_activate = on_activate
+
+        self.store = Gio.ListStore(item_type=JobItem)
+
+        self.search_entry = Gtk.SearchEntry()
+        self.search_entry.set_placeholder_text("Filter tasks")
+        self.search_entry.set_margin_top(6)
+        self.search_entry.set_margin_start(12)
+        self.search_entry.set_margin_end(12)
+        self.search_entry.connect("search-changed", self._on_search_changed)
+        self.append(self.search_entry)
+
+        self.filter = Gtk.StringFilter(
+            expression=Gtk.PropertyExpression.new(JobItem, None, "search-text"),
+            match_mode=Gtk.StringFilterMatchMode.SUBSTRING,
+            ignore_case=True,
+        )
+        filter_model = Gtk.FilterListModel(model=self.store, filter=self.filter)
+        # Filter in chunks on the main loop so typing stays responsive on huge lists
+        filter_model.set_incremental(True)
+
+        self.column_view = Gtk.ColumnView()
+        self.column_view.add_css_class("data-table")
+        self.column_view.set_reorderable(True)
+        self.column_view.connect("activate", self._on_row_activated)
+
+        sort_model = Gtk.SortListModel(model=filter_model, sorter=self.column_view.get_sorter())
+        self.selection = Gtk.SingleSelection(model=sort_model, autoselect=False)
+        self.column_view.set_model(self.selection)
+
+        string_sorter = lambda name: Gtk.StringSorter(expression=Gtk.PropertyExpression.new(JobItem, None, name))
+        self._add_column("Schedule", lambda item: item.schedule, string_sorter("schedule"))
+        self._add_column(
+            "Next Run",
+            JobItem.next_run_text,
+            Gtk.NumericSorter(expression=Gtk.PropertyExpression.new(JobItem, None, "next-run")),
+        )
+        self._add_column("Command", lambda item: item.command, string_sorter("command"), expand=True)
+        self._add_column("Comment", lambda item: item.comment, string_sorter("comment"))
+        self._add_column("Source", lambda item: item.source, string_sorter("source"))
+        self._add_column(
+            "Cost",
+            JobItem.cost_text,
+            Gtk.NumericSorter(expression=Gtk.PropertyExpression.new(JobItem, None, "cost"),
+                              sort_order=Gtk.SortType.DESCENDING),
+            tooltip=lambda item: "\n".join(finding.message for finding in item.analysis.findings),
+        )
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.set_child(self.column_view)
+        self.append(scrolled)
+
+    def _add_column(self, title: str, text: Callable[[JobItem], str], sorter: Gtk.Sorter,
+                    expand: bool = False, tooltip: Optional[Callable[[JobItem], str]] = None) -> None:
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_setup_cell)
+        factory.connect("bind", self._on_bind_cell, text, tooltip)
+
+        column = Gtk.ColumnViewColumn(title=title, factory=factory, sorter=sorter)
+        column.set_resizable(True)
+        column.set_expand(expand)
+        self.column_view.append_column(column)
+
+    def _on_setup_cell(self, factory: Gtk.SignalListItemFactory, list_item: Gtk.ListItem) -> None:
+        label = Gtk.Label()
+        label.set_xalign(0)
+        label.set_ellipsize(Pango.EllipsizeMode.END)
+        list_item.set_child(label)
+
+    def _on_bind_cell(self, factory: Gtk.SignalListItemFactory, list_item: Gtk.ListItem,
+                      text: Callable[[JobItem], str], tooltip: Optional[Callable[[JobItem], str]]) -> None:
+        item = list_item.get_item()
+        label = list_item.get_child()
+        label.set_text(text(item))
+        if tooltip:
+            label.set_tooltip_text(tooltip(item) or None)
+        if item.job.enabled:
+            label.remove_css_class("dim-label")
+        else:
+            label.add_css_class("dim-label")
+
+    def set_jobs(self, jobs: Iterable[CronJob], source: str) -> None:
+        """Replace the table contents with a single items-changed emission."""
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        items = [JobItem(job, source, now) for job in jobs]
+        self.store.splice(0, self.store.get_n_items(), items)
+
+    def _on_search_changed(self, entry: Gtk.SearchEntry) -> None:
+        self.filter.set_search(entry.get_text())
+
+    def _on_row_activated(self, column_view: Gtk.ColumnView, position: int) -> None:
+        item = self.selection.get_item(position)
+        if item is not None:
+            self.on_activate(item.job)
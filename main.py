@@ -22,9 +22,17 @@ from typing import Optional
 import gi
 
 gi.require_version("Gtk", "4.0")
-from gi.repository import GLib, Gtk
+from gi.repository import Gio, GLib, Gtk
 
+from cli import run_subcommand
+from cron_analysis import analyze_job
+from cron_dedup import Redundancy, find_redundant_jobs
 from cron_manager import CronManager, CronJob
+from cron_sources import ParseCache, load_system_jobs
+from dbus_service import CrontabService
+from history_dialog import HistoryDialog
+from job_table import JobTable
+from perf_trace import tracer
 from task_dialog import TaskDialog
 
 
@@ -70,16 +78,56 @@ class TaskerWindow(Gtk.ApplicationWindow):
         refresh_button.connect("clicked", self._on_refresh)
         header.pack_end(refresh_button)
         
+        history_button = Gtk.Button(icon_name="document-open-recent-symbolic")
+        history_button.set_tooltip_text("History")
+        history_button.connect("clicked", self._on_show_history)
+        header.pack_end(history_button)
+        
+        self.groups_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        self.groups_box.set_margin_top(8)
+        self.groups_box.set_margin_bottom(8)
+        self.groups_box.set_margin_start(8)
+        self.groups_box.set_margin_end(8)
+        groups_popover = Gtk.Popover()
+        groups_popover.set_child(self.groups_box)
+        
+        self.groups_button = Gtk.MenuButton(icon_name="tag-symbolic")
+        self.groups_button.set_tooltip_text("Groups")
+        self.groups_button.set_popover(groups_popover)
+        header.pack_end(self.groups_button)
+        
+        dedup_button = Gtk.Button(icon_name="edit-clear-all-symbolic")
+        dedup_button.set_tooltip_text("Find duplicate tasks")
+        dedup_button.connect("clicked", self._on_find_duplicates)
+        header.pack_end(dedup_button)
+        
+        self.table_button = Gtk.ToggleButton(icon_name="view-grid-symbolic")
+        self.table_button.set_tooltip_text("Table view")
+        self.table_button.connect("toggled", self._on_view_toggled)
+        header.pack_end(self.table_button)
+        
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        self.set_child(main_box)
+        overlay = Gtk.Overlay()
+        overlay.set_child(main_box)
+        self.set_child(overlay)
+        
+        self.view_stack = Gtk.Stack()
+        self.view_stack.set_vexpand(True)
+        main_box.append(self.view_stack)
         
         scrolled = Gtk.ScrolledWindow()
-        scrolled.set_vexpand(True)
-        main_box.append(scrolled)
+        self.view_stack.add_named(scrolled, "list")
         
         self.job_list = Gtk.ListBox()
         self.job_list.set_selection_mode(Gtk.SelectionMode.NONE)
         scrolled.set_child(self.job_list)
+        # Only the visible view is rebuilt on refresh; the other one catches up when shown
+        self._job_list_stale = False
+        self._job_table_stale = False
+        
+        self.job_table = JobTable(on_activate=self._on_table_activate)
+        self.parse_cache = ParseCache()
+        self.view_stack.add_named(self.job_table, "table")
         
         self.status_bar = Gtk.Label()
         self.status_bar.add_css_class("dim-label")
@@ -89,9 +137,67 @@ class TaskerWindow(Gtk.ApplicationWindow):
         self.status_bar.set_margin_end(12)
         main_box.append(self.status_bar)
         
+        if tracer.enabled:
+            self._setup_trace_overlay(overlay)
+        
         self._update_crontab_manager()
+        app.service.listeners.append(self._on_service_changed)
+        self.connect("destroy", lambda w: app.service.listeners.remove(self._on_service_changed))
         self._refresh_jobs()
 
+    def _setup_trace_overlay(self, overlay: Gtk.Overlay) -> None:
+        """Add the hidden performance overlay, toggled with Ctrl+Shift+D."""
+        self._trace_timeout_id: Optional[int] = None
+        
+        self.trace_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+        self.trace_box.add_css_class("trace-overlay")
+        self.trace_box.set_halign(Gtk.Align.END)
+        self.trace_box.set_valign(Gtk.Align.START)
+        self.trace_box.set_margin_top(12)
+        self.trace_box.set_margin_end(12)
+        self.trace_box.set_visible(False)
+        overlay.add_overlay(self.trace_box)
+        
+        self.trace_label = Gtk.Label()
+        self.trace_label.add_css_class("monospace")
+        self.trace_label.set_xalign(0)
+        self.trace_label.set_selectable(True)
+        self.trace_box.append(self.trace_label)
+        
+        dump_button = Gtk.Button(label="Save Chrome Trace")
+        dump_button.connect("clicked", self._on_dump_trace)
+        self.trace_box.append(dump_button)
+        
+        controller = Gtk.ShortcutController()
+        controller.set_scope(Gtk.ShortcutScope.GLOBAL)
+        controller.add_shortcut(Gtk.Shortcut.new(
+            Gtk.ShortcutTrigger.parse_string("<Control><Shift>d"),
+            Gtk.CallbackAction.new(self._on_toggle_trace_overlay),
+        ))
+        self.add_controller(controller)
+
+    def _on_toggle_trace_overlay(self, widget: Gtk.Widget, args) -> bool:
+        visible = not self.trace_box.get_visible()
+        self.trace_box.set_visible(visible)
+        if visible and self._trace_timeout_id is None:
+            self._update_trace_overlay()
+            self._trace_timeout_id = GLib.timeout_add_seconds(1, self._update_trace_overlay)
+        return True
+
+    def _update_trace_overlay(self) -> bool:
+        if not self.trace_box.get_visible():
+            self._trace_timeout_id = None
+            return False
+        self.trace_label.set_text(tracer.summary())
+        return True
+
+    def _on_dump_trace(self, button: Gtk.Button) -> None:
+        try:
+            path = tracer.dump()
+            self._update_status(f"Trace written to {path}")
+        except OSError as e:
+            self._show_error(f"Failed to write trace: {e}")
+
     def _on_crontab_changed(self, switch: Gtk.Switch, state: bool) -> bool:
         if state:
             if not self._authenticate_for_system_mode():
@@ -124,7 +230,13 @@ class TaskerWindow(Gtk.ApplicationWindow):
             return False
 
     def _update_crontab_manager(self) -> None:
-        self.cron_manager = CronManager(is_system=self.is_system)
+        # Shared with D-Bus clients, so both see one parsed crontab
+        self.cron_manager = self.get_application().service.manager(self.is_system)
+
+    def _on_service_changed(self, system: bool) -> None:
+        """Refresh after a D-Bus client or another program changed the crontab."""
+        if system == self.is_system:
+            GLib.idle_add(self._refresh_jobs)
 
     def _on_add_task(self, button: Gtk.Button) -> None:
         dialog = TaskDialog(self)
@@ -228,35 +340,211 @@ class TaskerWindow(Gtk.ApplicationWindow):
         
         dialog.destroy()
 
+    def _refresh_groups(self) -> None:
+        """Rebuild the groups popover from the tags of the loaded jobs."""
+        while child := self.groups_box.get_first_child():
+            self.groups_box.remove(child)
+        
+        index = self.cron_manager.tag_index(self.current_jobs)
+        self.groups_button.set_sensitive(bool(index))
+        for tag in sorted(index):
+            jobs = index[tag]
+            disabled = sum(1 for job in jobs if not job.enabled)
+            
+            tag_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+            self.groups_box.append(tag_box)
+            
+            tag_label = Gtk.Label(label=f"{tag} ({len(jobs)} task(s), {disabled} disabled)")
+            tag_label.set_xalign(0)
+            tag_label.set_hexpand(True)
+            tag_box.append(tag_label)
+            
+            disable_button = Gtk.Button(label="Disable All")
+            disable_button.set_sensitive(disabled < len(jobs))
+            disable_button.connect("clicked", self._on_tag_enabled, tag, False)
+            tag_box.append(disable_button)
+            
+            enable_button = Gtk.Button(label="Enable All")
+            enable_button.set_sensitive(disabled > 0)
+            enable_button.connect("clicked", self._on_tag_enabled, tag, True)
+            tag_box.append(enable_button)
+
+    def _on_tag_enabled(self, button: Gtk.Button, tag: str, enabled: bool) -> None:
+        self.groups_button.popdown()
+        self._set_enabled(lambda: self.cron_manager.set_tag_enabled(tag, enabled), enabled)
+
+    def _on_job_enabled_changed(self, switch: Gtk.Switch, state: bool, job: CronJob) -> bool:
+        if state != job.enabled:
+            # Defer the rebuild so the switch isn't destroyed inside its own handler
+            GLib.idle_add(self._set_enabled, lambda: self.cron_manager.set_jobs_enabled([job], state), state)
+        return False
+
+    def _set_enabled(self, change, enabled: bool) -> bool:
+        action = "enabled" if enabled else "disabled"
+        try:
+            count = change()
+            self._refresh_jobs()
+            self._update_status(f"{count} task(s) {action}")
+        except RuntimeError as e:
+            error_msg = str(e)
+            if self.is_system and ("sudo" in error_msg.lower() or "password" in error_msg.lower()):
+                if self._authenticate_for_system_mode():
+                    try:
+                        count = change()
+                        self._refresh_jobs()
+                        self._update_status(f"{count} task(s) {action}")
+                    except Exception as retry_error:
+                        self._show_error(f"Failed to update tasks: {retry_error}")
+                        self._refresh_jobs()
+                else:
+                    self._show_error("Authentication required to update tasks")
+                    self._refresh_jobs()
+            else:
+                self._show_error(f"Failed to update tasks: {e}")
+                self._refresh_jobs()
+        except Exception as e:
+            self._show_error(f"Failed to update tasks: {e}")
+            self._refresh_jobs()
+        return GLib.SOURCE_REMOVE
+
+    def _on_find_duplicates(self, button: Gtk.Button) -> None:
+        redundant = find_redundant_jobs(self.current_jobs)
+        if not redundant:
+            self._update_status("No duplicate or redundant tasks found")
+            return
+        
+        dialog = Gtk.Dialog(
+            title="Remove Redundant Tasks?",
+            transient_for=self,
+            modal=True,
+        )
+        dialog.set_default_size(600, 400)
+        
+        content = dialog.get_content_area()
+        content.set_spacing(12)
+        content.set_margin_top(20)
+        content.set_margin_bottom(20)
+        content.set_margin_start(20)
+        content.set_margin_end(20)
+        
+        message_label = Gtk.Label(
+            label=f"{len(redundant)} task(s) run a command that another task already runs at the same times:"
+        )
+        message_label.set_wrap(True)
+        message_label.set_xalign(0)
+        content.append(message_label)
+        
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        content.append(scrolled)
+        
+        details = []
+        for item in redundant:
+            relation = "duplicates" if item.kind == "duplicate" else "is covered by"
+            details.append(f"{item.job}\n    {relation} {item.kept}")
+        details_label = Gtk.Label(label="\n\n".join(details))
+        details_label.set_xalign(0)
+        details_label.set_yalign(0)
+        details_label.set_selectable(True)
+        details_label.add_css_class("monospace")
+        scrolled.set_child(details_label)
+        
+        dialog.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        remove_button = dialog.add_button(f"Remove {len(redundant)} Task(s)", Gtk.ResponseType.YES)
+        remove_button.add_css_class("destructive-action")
+        dialog.set_default_response(Gtk.ResponseType.CANCEL)
+        
+        dialog.connect("response", self._on_duplicates_confirm, redundant)
+        dialog.present()
+
+    def _on_duplicates_confirm(self, dialog: Gtk.Dialog, response_id: int, redundant: list[Redundancy]) -> None:
+        dialog.destroy()
+        
+        if response_id == Gtk.ResponseType.YES:
+            jobs = [item.job for item in redundant]
+            try:
+                removed = self.cron_manager.delete_jobs(jobs)
+                self._refresh_jobs()
+                self._update_status(f"Removed {removed} redundant task(s)")
+            except RuntimeError as e:
+                error_msg = str(e)
+                if self.is_system and ("sudo" in error_msg.lower() or "password" in error_msg.lower()):
+                    if self._authenticate_for_system_mode():
+                        try:
+                            removed = self.cron_manager.delete_jobs(jobs)
+                            self._refresh_jobs()
+                            self._update_status(f"Removed {removed} redundant task(s)")
+                        except Exception as retry_error:
+                            self._show_error(f"Failed to remove tasks: {retry_error}")
+                    else:
+                        self._show_error("Authentication required to remove tasks")
+                else:
+                    self._show_error(f"Failed to remove tasks: {e}")
+            except Exception as e:
+                self._show_error(f"Failed to remove tasks: {e}")
+
+    def _on_show_history(self, button: Gtk.Button) -> None:
+        dialog = HistoryDialog(self, self.cron_manager.history)
+        dialog.connect("response", self._on_history_response)
+        dialog.present()
+
+    def _on_history_response(self, dialog: HistoryDialog, response_id: int) -> None:
+        version = dialog.selected_version
+        dialog.destroy()
+        
+        if response_id == Gtk.ResponseType.APPLY and version is not None:
+            try:
+                self.cron_manager.rollback(version)
+                self._refresh_jobs()
+                self._update_status(f"Restored version {version}")
+            except RuntimeError as e:
+                error_msg = str(e)
+                if self.is_system and ("sudo" in error_msg.lower() or "password" in error_msg.lower()):
+                    if self._authenticate_for_system_mode():
+                        try:
+                            self.cron_manager.rollback(version)
+                            self._refresh_jobs()
+                            self._update_status(f"Restored version {version}")
+                        except Exception as retry_error:
+                            self._show_error(f"Failed to restore version: {retry_error}")
+                    else:
+                        self._show_error("Authentication required to restore version")
+                else:
+                    self._show_error(f"Failed to restore version: {e}")
+            except Exception as e:
+                self._show_error(f"Failed to restore version: {e}")
+
     def _on_refresh(self, button: Gtk.Button) -> None:
         self._refresh_jobs()
 
+    def _on_table_activate(self, job: CronJob) -> None:
+        if job.source:
+            self._show_error(f"This task comes from {job.source} and can only be edited there")
+            return
+        self._on_edit_task(None, job)
+
+    def _on_view_toggled(self, button: Gtk.ToggleButton) -> None:
+        if button.get_active():
+            if self._job_table_stale:
+                self._rebuild_job_table()
+            self.view_stack.set_visible_child_name("table")
+            return
+        if self._job_list_stale:
+            self._rebuild_job_list()
+        self.view_stack.set_visible_child_name("list")
+
     def _refresh_jobs(self) -> None:
-        while child := self.job_list.get_first_child():
-            self.job_list.remove(child)
-        
         try:
             self.current_jobs = self.cron_manager.get_jobs()
             
-            if not self.current_jobs:
-                empty_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
-                empty_box.set_margin_top(48)
-                empty_box.set_margin_bottom(48)
-                
-                empty_label = Gtk.Label(label="No scheduled tasks")
-                empty_label.add_css_class("dim-label")
-                empty_label.add_css_class("title-1")
-                empty_box.append(empty_label)
-                
-                hint_label = Gtk.Label(label="Click 'Add Task' to create your first scheduled task")
-                hint_label.add_css_class("dim-label")
-                empty_box.append(hint_label)
-                
-                self.job_list.append(empty_box)
+            if self.view_stack.get_visible_child_name() == "list":
+                self._rebuild_job_list()
+                self._job_table_stale = True
             else:
-                for job in self.current_jobs:
-                    row = self._create_job_row(job)
-                    self.job_list.append(row)
+                self._rebuild_job_table()
+                self._job_list_stale = True
+            
+            self._refresh_groups()
             
             crontab_type = "system" if self.is_system else "user"
             self._update_status(f"Loaded {len(self.current_jobs)} task(s) from {crontab_type} crontab")
@@ -271,8 +559,46 @@ class TaskerWindow(Gtk.ApplicationWindow):
         except Exception as e:
             self._show_error(f"Failed to load tasks: {e}")
 
+    def _rebuild_job_table(self) -> None:
+        table_jobs = self.current_jobs
+        if self.is_system:
+            # The table also lists /etc/crontab, /etc/cron.d and readable spools, read-only
+            table_jobs = table_jobs + load_system_jobs(self.parse_cache)
+        with tracer.span("ui.table", rows=len(table_jobs)):
+            self.job_table.set_jobs(table_jobs, "system crontab" if self.is_system else "user crontab")
+        self._job_table_stale = False
+
+    def _rebuild_job_list(self) -> None:
+        with tracer.span("ui.clear"):
+            while child := self.job_list.get_first_child():
+                self.job_list.remove(child)
+        self._job_list_stale = False
+        
+        if not self.current_jobs:
+            empty_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+            empty_box.set_margin_top(48)
+            empty_box.set_margin_bottom(48)
+            
+            empty_label = Gtk.Label(label="No scheduled tasks")
+            empty_label.add_css_class("dim-label")
+            empty_label.add_css_class("title-1")
+            empty_box.append(empty_label)
+            
+            hint_label = Gtk.Label(label="Click 'Add Task' to create your first scheduled task")
+            hint_label.add_css_class("dim-label")
+            empty_box.append(hint_label)
+            
+            self.job_list.append(empty_box)
+        else:
+            with tracer.span("ui.rebuild", rows=len(self.current_jobs)):
+                for job in self.current_jobs:
+                    row = self._create_job_row(job)
+                    self.job_list.append(row)
+
     def _create_job_row(self, job: CronJob) -> Gtk.ListBoxRow:
         row = Gtk.ListBoxRow()
+        if not job.enabled:
+            row.add_css_class("disabled-job")
         
         box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
         box.set_margin_top(12)
@@ -297,15 +623,38 @@ class TaskerWindow(Gtk.ApplicationWindow):
         command_label.set_wrap(True)
         info_box.append(command_label)
         
-        if job.comment:
-            comment_label = Gtk.Label(label=f"Comment: {job.comment}")
+        if job.title:
+            comment_label = Gtk.Label(label=f"Comment: {job.title}")
             comment_label.set_xalign(0)
             comment_label.add_css_class("dim-label")
             info_box.append(comment_label)
         
+        if job.tags:
+            tags_label = Gtk.Label(label=f"Tags: {', '.join(job.tags)}")
+            tags_label.set_xalign(0)
+            tags_label.add_css_class("dim-label")
+            info_box.append(tags_label)
+        
         button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
         box.append(button_box)
         
+        analysis = analyze_job(job)
+        if analysis.warnings:
+            warning_icon = Gtk.Image.new_from_icon_name("dialog-warning-symbolic")
+            warning_icon.add_css_class("warning")
+            warning_icon.set_tooltip_text(
+                f"Cost: {analysis.cost:g} ({analysis.level}, about {analysis.runs_per_day:g} runs a day)\n"
+                + "\n".join(f"• {finding.message}" for finding in analysis.findings)
+            )
+            button_box.append(warning_icon)
+        
+        enabled_switch = Gtk.Switch()
+        enabled_switch.set_active(job.enabled)
+        enabled_switch.set_valign(Gtk.Align.CENTER)
+        enabled_switch.set_tooltip_text("Enabled")
+        enabled_switch.connect("state-set", self._on_job_enabled_changed, job)
+        button_box.append(enabled_switch)
+        
         edit_button = Gtk.Button(icon_name="document-edit-symbolic")
         edit_button.set_tooltip_text("Edit")
         edit_button.connect("clicked", self._on_edit_task, job)
@@ -352,10 +701,20 @@ class TaskerWindow(Gtk.ApplicationWindow):
 
 class MyApplication(Gtk.Application):
     def __init__(self):
-        super().__init__(application_id="me.arbaoui.tasker")
+        # Take the bus name over from a running `tasker service`
+        super().__init__(application_id="me.arbaoui.tasker", flags=Gio.ApplicationFlags.REPLACE)
         GLib.set_application_name("Tasker")
+        self.service = CrontabService()
         self._load_css()
 
+    def do_dbus_register(self, connection: Gio.DBusConnection, object_path: str) -> bool:
+        Gtk.Application.do_dbus_register(self, connection, object_path)
+        return self.service.register(connection)
+
+    def do_dbus_unregister(self, connection: Gio.DBusConnection, object_path: str) -> None:
+        self.service.unregister(connection)
+        Gtk.Application.do_dbus_unregister(self, connection, object_path)
+
     def _load_css(self):
         # Try system path first, then local
         css_paths = [
@@ -375,7 +734,11 @@ class MyApplication(Gtk.Application):
 
 
 def main():
-    """Main entry point."""
+    """Start the GUI. The `tasker` command goes through cli.main, which handles subcommands first."""
+    status = run_subcommand(sys.argv)
+    if status is not None:
+        sys.exit(status)
+
     app = MyApplication()
     exit_status = app.run(sys.argv)
     sys.exit(exit_status)
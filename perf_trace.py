@@ -0,0 +1,141 @@
+"""Lightweight tracing of Tasker's hot paths.
+
+Copyright (C) 2025  Anas Arbaoui
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Tracing is off unless TASKER_TRACE is set to a non-empty value other than
+"0"; spans then cost a no-op context manager. With TASKER_TRACE_FILE set,
+a Chrome trace-event JSON file (chrome://tracing, Perfetto) is written at exit.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ENABLED = os.environ.get("TASKER_TRACE", "") not in ("", "0")
+TRACE_FILE = os.environ.get("TASKER_TRACE_FILE")
+
+# Keep the most recent events only, so a long session cannot grow without bound
+MAX_EVENTS = 100_000
+# Histogram buckets are powers of two in microseconds: bucket n holds [2**(n-1), 2**n)
+BUCKETS = 40
+
+_DISABLED = nullcontext()
+
+
+@dataclass
+class SpanStats:
+    """Count, total time and a log2 histogram of durations for one span name."""
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    histogram: List[int] = field(default_factory=lambda: [0] * BUCKETS)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        bucket = min(int(seconds * 1_000_000).bit_length(), BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of samples, in seconds."""
+        threshold = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= threshold:
+                return min((1 << bucket) / 1_000_000, self.max)
+        return self.max
+
+
+class Tracer:
+    """Collects spans as counters, histograms and trace events."""
+
+    def __init__(self):
+        self.enabled = ENABLED
+        self.stats: Dict[str, SpanStats] = {}
+        self.events: deque = deque(maxlen=MAX_EVENTS)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def _span(self, name: str, args: dict):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.stats.setdefault(name, SpanStats()).add(elapsed)
+                self.events.append((name, started - self._origin, elapsed, threading.get_ident(), args))
+
+    def span(self, name: str, **args):
+        """Time a block: `with tracer.span("crontab.wait"): ...`."""
+        if not self.enabled:
+            return _DISABLED
+        return self._span(name, args)
+
+    def summary(self) -> str:
+        """Render a plain-text table of all spans, slowest total first."""
+        with self._lock:
+            rows = sorted(self.stats.items(), key=lambda item: item[1].total, reverse=True)
+        lines = [f"{'span':<22}{'count':>7}{'total ms':>11}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        for name, stats in rows:
+            lines.append(
+                f"{name:<22}{stats.count:>7}{stats.total * 1000:>11.1f}"
+                f"{stats.total / stats.count * 1000:>10.2f}{stats.percentile(0.95) * 1000:>10.2f}"
+                f"{stats.max * 1000:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """Return the recorded spans as Chrome trace-event JSON."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": round(start * 1_000_000, 3),
+                    "dur": round(duration * 1_000_000, 3),
+                    "pid": pid,
+                    "tid": tid,
+                    "args": args,
+                }
+                for name, start, duration, tid, args in events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def dump(self, path: Optional[Path] = None) -> Path:
+        """Write the Chrome trace to path (default: TASKER_TRACE_FILE or ~/tasker-trace.json)."""
+        path = Path(path or TRACE_FILE or Path.home() / "tasker-trace.json")
+        path.write_text(json.dumps(self.chrome_trace()))
+        return path
+
+
+tracer = Tracer()
+
+if ENABLED and TRACE_FILE:
+    atexit.register(tracer.dump)
@@ -9,14 +9,15 @@ setup(
     author="Anas Arbaoui",
     author_email="anas@arbaoui.me",
     url="https://github.com/Anarbb/tasker",
-    py_modules=["main", "cron_manager", "task_dialog"],
+    py_modules=["main", "cli", "cron_analysis", "cron_dedup", "cron_manager", "cron_schedule", "cron_runner", "cron_formats", "cron_history", "cron_sources", "dbus_service", "perf_trace", "history_dialog", "job_table", "task_dialog"],
     data_files=[
         ("share/applications", ["me.arbaoui.tasker.desktop"]),
         ("share/tasker", ["ui.css"]),
+        ("share/dbus-1/services", ["me.arbaoui.tasker.service"]),
     ],
     entry_points={
         "console_scripts": [
-            "tasker=main:main",
+            "tasker=cli:main",
         ],
     },
     scripts=[],
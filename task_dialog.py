@@ -15,6 +15,7 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from datetime import datetime, timezone
 from typing import Optional
 
 import gi
@@ -23,6 +24,7 @@ gi.require_version("Gtk", "4.0")
 from gi.repository import Gtk
 
 from cron_manager import CronJob
+from cron_schedule import describe_schedule, field_error, next_runs
 
 
 class TaskDialog(Gtk.Dialog):
@@ -116,14 +118,14 @@ class TaskDialog(Gtk.Dialog):
             self._detect_schedule_type(job)
             self._populate_from_job(job)
         
-        self._update_preview()
-        
         cancel_button = self.add_button("Cancel", Gtk.ResponseType.CANCEL)
         
         save_button = self.add_button("Save", Gtk.ResponseType.ACCEPT)
         save_button.add_css_class("suggested-action")
         
         self.set_default_response(Gtk.ResponseType.ACCEPT)
+        
+        self._update_preview()
 
     def _create_simple_schedule_box(self) -> Gtk.Box:
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
@@ -246,6 +248,9 @@ class TaskDialog(Gtk.Dialog):
         self.dow_entry.connect("changed", self._on_cron_field_changed)
         schedule_grid.attach(self.dow_entry, 1, 4, 1, 1)
         
+        # Same order as the crontab columns, so the index matches cron_schedule.FIELDS
+        self.cron_entries = [self.minute_entry, self.hour_entry, self.dom_entry, self.month_entry, self.dow_entry]
+        
         return box
 
     def _on_advanced_toggled(self, switch: Gtk.Switch, state: bool) -> bool:
@@ -287,12 +292,29 @@ class TaskDialog(Gtk.Dialog):
         self._update_preview()
 
     def _update_preview(self) -> None:
+        error = None
         if self.schedule_stack.get_visible_child_name() == "simple":
-            preview = self._get_simple_preview()
+            preview = self._get_simple_preview() + self._get_next_runs_preview(self._get_simple_schedule())
         else:
-            preview = self._get_advanced_preview()
+            error = self._validate_cron_fields()
+            preview = error or self._get_advanced_preview()
         
         self.preview_label.set_text(preview)
+        self.set_response_sensitive(Gtk.ResponseType.ACCEPT, error is None)
+
+    def _validate_cron_fields(self) -> Optional[str]:
+        """Highlight invalid advanced fields. Returns the first error, if any."""
+        first_error = None
+        for index, entry in enumerate(self.cron_entries):
+            error = field_error(index, entry.get_text().strip() or "*")
+            if error:
+                entry.add_css_class("error")
+                entry.set_tooltip_text(error)
+                first_error = first_error or error
+            else:
+                entry.remove_css_class("error")
+                entry.set_tooltip_text(None)
+        return first_error
 
     def _get_simple_preview(self) -> str:
         if self.schedule_type == "hourly":
@@ -318,8 +340,21 @@ class TaskDialog(Gtk.Dialog):
         month = self.month_entry.get_text().strip() or "*"
         dow = self.dow_entry.get_text().strip() or "*"
         
-        schedule = f"{minute} {hour} {dom} {month} {dow}"
-        return f"Schedule: {schedule}"
+        fields = (minute, hour, dom, month, dow)
+        return describe_schedule(*fields) + self._get_next_runs_preview(fields)
+
+    def _get_next_runs_preview(self, fields: tuple[str, str, str, str, str], count: int = 5) -> str:
+        after = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        # New jobs are added above any CRON_TZ line, so they run in the system zone
+        zone_name = self.job.timezone if self.job else None
+        try:
+            runs = next_runs(*fields, count, after, zone_name)
+        except ValueError as e:
+            return f"\n\n{e}"
+        if not runs:
+            return "\n\nThis schedule never runs"
+        lines = [when.strftime("%a %Y-%m-%d %H:%M %Z") for when in runs]
+        return f"\n\nNext {len(runs)} runs:\n" + "\n".join(lines)
 
     def _detect_schedule_type(self, job: CronJob) -> None:
         if (job.minute == "0" and job.hour == "*" and 
@@ -384,7 +419,9 @@ class TaskDialog(Gtk.Dialog):
             month=month,
             day_of_week=dow,
             command=command,
-            comment=comment
+            comment=comment,
+            timezone=self.job.timezone if self.job else None,
+            enabled=self.job.enabled if self.job else True,
         )
 
     def _get_simple_schedule(self) -> tuple[str, str, str, str, str]:
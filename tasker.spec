@@ -47,14 +47,39 @@ mkdir -p %{buildroot}%{_datadir}/tasker
 
 %files
 %{python3_sitelib}/main.py
+%{python3_sitelib}/cli.py
+%{python3_sitelib}/cron_analysis.py
+%{python3_sitelib}/cron_dedup.py
 %{python3_sitelib}/cron_manager.py
+%{python3_sitelib}/cron_schedule.py
+%{python3_sitelib}/cron_runner.py
+%{python3_sitelib}/cron_formats.py
+%{python3_sitelib}/cron_history.py
+%{python3_sitelib}/cron_sources.py
+%{python3_sitelib}/dbus_service.py
+%{python3_sitelib}/perf_trace.py
+%{python3_sitelib}/history_dialog.py
+%{python3_sitelib}/job_table.py
 %{python3_sitelib}/task_dialog.py
 %{python3_sitelib}/__pycache__/main.*.pyc
+%{python3_sitelib}/__pycache__/cli.*.pyc
+%{python3_sitelib}/__pycache__/cron_analysis.*.pyc
+%{python3_sitelib}/__pycache__/cron_dedup.*.pyc
 %{python3_sitelib}/__pycache__/cron_manager.*.pyc
+%{python3_sitelib}/__pycache__/cron_schedule.*.pyc
+%{python3_sitelib}/__pycache__/cron_runner.*.pyc
+%{python3_sitelib}/__pycache__/cron_formats.*.pyc
+%{python3_sitelib}/__pycache__/cron_history.*.pyc
+%{python3_sitelib}/__pycache__/cron_sources.*.pyc
+%{python3_sitelib}/__pycache__/dbus_service.*.pyc
+%{python3_sitelib}/__pycache__/perf_trace.*.pyc
+%{python3_sitelib}/__pycache__/history_dialog.*.pyc
+%{python3_sitelib}/__pycache__/job_table.*.pyc
 %{python3_sitelib}/__pycache__/task_dialog.*.pyc
 %{python3_sitelib}/tasker-*.egg-info
 %{_bindir}/tasker
 %{_datadir}/applications/me.arbaoui.tasker.desktop
+%{_datadir}/dbus-1/services/me.arbaoui.tasker.service
 %{_datadir}/tasker/ui.css
 %{_datadir}/icons/hicolor/48x48/apps/tasker.png
 %doc README.md LICENSE